@@ -1,7 +1,8 @@
 from typing import Optional, List, Union
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+import jwt
+from jwt import InvalidTokenError
 from pydantic import ValidationError, BaseModel
 
 from app.core.config import settings
@@ -64,7 +65,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
         user_id: str = payload.get("sub")
         if user_id is None:
             raise InvalidToken("无法识别用户身份")
-    except JWTError:
+    except InvalidTokenError:
         raise InvalidToken()
         
     user = await User.get_or_none(id=user_id)
@@ -1,7 +1,8 @@
-from typing import List, Optional, Callable, Any
+from typing import List, Optional, Callable, Any, Union
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime
+from tortoise.expressions import Q, Subquery
 
 from app.api.dependencies.auth import get_current_active_user
 from app.models.enums import UserRole
@@ -9,10 +10,20 @@ from app.models.user import User
 from app.models.student import Student
 from app.models.teacher import Teacher
 from app.models.class_model import Class
+from app.models.score import Score
+from app.db.cache import memoize, invalidate
 
 # 权限错误消息
 PERMISSION_ERROR_MESSAGE = "对不起，您没有权限执行此操作"
 
+# 班级的班主任及任课教师对应用户ID的Redis缓存，按班级存储，班级的教师关系变更时删除
+TEACHER_CLASS_ACCESS_TTL = 60  # 秒
+
+
+def class_teacher_users_cache_key(class_id: int) -> str:
+    """班级班主任及任课教师用户ID的缓存键"""
+    return f"class:teacher_users:{class_id}"
+
 # --------------------- 角色验证依赖 ---------------------
 
 async def check_is_admin(current_user: User = Depends(get_current_active_user)) -> User:
@@ -44,6 +55,31 @@ async def check_is_headteacher_or_admin(current_user: User = Depends(get_current
 
 # --------------------- 资源访问控制依赖 ---------------------
 
+async def get_class_teacher_user_ids(class_id: int) -> List[int]:
+    """班级的班主任及任课教师对应的用户ID（优先读取缓存）"""
+    return await memoize(
+        class_teacher_users_cache_key(class_id),
+        TEACHER_CLASS_ACCESS_TTL,
+        lambda: Teacher.filter(
+            Q(managed_class__id=class_id) | Q(teaching_classes__id=class_id)
+        ).distinct().values_list("user_id", flat=True)
+    )
+
+async def can_teacher_access_class(user_id: int, class_id: int) -> bool:
+    """用户对应的教师是否为该班级的班主任或任课教师"""
+    return user_id in await get_class_teacher_user_ids(class_id)
+
+def teacher_class_ids_subquery(user_id: int) -> Subquery:
+    """用户对应教师担任班主任或任课教师的班级ID子查询，用于将访问权限作为查询条件下推到SQL"""
+    return Subquery(
+        Class.filter(Q(headteacher__user_id=user_id) | Q(teachers__user_id=user_id)).values("id")
+    )
+
+async def invalidate_teacher_class_access_cache(*class_ids: int) -> None:
+    """班主任或任课教师关系变更后删除相关班级的访问权限缓存"""
+    if class_ids:
+        await invalidate(*(class_teacher_users_cache_key(class_id) for class_id in class_ids))
+
 async def check_student_access(
     student_id: int,
     current_user: User = Depends(get_current_active_user)
@@ -126,10 +162,18 @@ async def check_student_access(
     )
 
 async def check_class_access(
-    class_id: int,
+    class_id: Union[int, Class],
     current_user: User = Depends(get_current_active_user)
 ) -> bool:
-    """检查用户是否有权限访问班级数据"""
+    """
+    检查用户是否有权限访问班级数据
+    
+    class_id 也可以直接传入已查询的班级对象，避免重复查询班级
+    """
+    class_obj = class_id if isinstance(class_id, Class) else None
+    if class_obj is not None:
+        class_id = class_obj.id
+    
     # 管理员可以访问所有班级数据
     if current_user.role == UserRole.ADMIN:
         return True
@@ -153,9 +197,13 @@ async def check_class_access(
                 detail="未找到对应的教师信息"
             )
             
-        # 获取班主任管理的班级
-        class_obj = await Class.filter(headteacher_id=teacher.id).first()
-        if not class_obj or class_obj.id != class_id:
+        # 已有班级对象时直接比较班主任ID，否则查询班主任管理的班级
+        if class_obj is not None:
+            is_headteacher = class_obj.headteacher_id == teacher.id
+        else:
+            managed_class = await Class.filter(headteacher_id=teacher.id).first()
+            is_headteacher = managed_class is not None and managed_class.id == class_id
+        if not is_headteacher:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="您只能查看自己管理的班级数据"
@@ -187,23 +235,28 @@ async def check_class_access(
     )
 
 async def check_score_access(
-    score_id: int,
+    score: Union[int, Score],
     current_user: User = Depends(get_current_active_user)
 ) -> bool:
-    """检查用户是否有权限访问或修改成绩数据"""
-    from app.models.score import Score
+    """
+    检查用户是否有权限访问或修改成绩数据
     
+    score 可以是成绩ID，也可以是已查询（建议通过select_related加载student）的成绩对象，
+    传入对象时不再重复查询成绩记录
+    """
     # 管理员可以访问所有成绩数据
     if current_user.role == UserRole.ADMIN:
         return True
         
     # 获取成绩信息
-    score = await Score.get_or_none(id=score_id).prefetch_related("student", "subject")
-    if not score:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"未找到ID为{score_id}的成绩"
-        )
+    if not isinstance(score, Score):
+        score_id = score
+        score = await Score.filter(id=score_id).select_related("student").first()
+        if not score:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"未找到ID为{score_id}的成绩"
+            )
         
     # 如果当前用户是学生，只能查看自己的成绩
     if current_user.role == UserRole.STUDENT:
@@ -214,6 +267,9 @@ async def check_score_access(
                 detail="您只能查看自己的成绩"
             )
         return True
+    
+    # 成绩所属学生：优先使用预加载的关联对象
+    student = score.student if isinstance(score.student, Student) else await Student.get_or_none(id=score.student_id)
         
     # 如果当前用户是班主任，只能查看自己班级学生的成绩
     if current_user.role == UserRole.HEADTEACHER:
@@ -233,7 +289,6 @@ async def check_score_access(
             )
             
         # 检查学生是否属于班主任的班级
-        student = await Student.get_or_none(id=score.student_id)
         if not student or student.class_field_id != class_obj.id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -258,7 +313,6 @@ async def check_score_access(
             )
             
         # 检查学生是否在教师任教的班级中
-        student = await Student.get_or_none(id=score.student_id)
         if not student:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -45,8 +45,8 @@ async def check_user_access(user_id: int, current_user: User = Depends(get_curre
     if current_user.role == UserRole.ADMIN:
         return True
         
-    # 查询目标用户
-    target_user = await User.get_or_none(id=user_id)
+    # 查询目标用户（只需角色，不读取密码哈希等其他列）
+    target_user = await User.filter(id=user_id).only("id", "role").first()
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -131,8 +131,8 @@ async def check_user_edit_permission(user_id: int, current_user: User = Depends(
     if current_user.role == UserRole.ADMIN:
         return True
         
-    # 查询目标用户
-    target_user = await User.get_or_none(id=user_id)
+    # 查询目标用户（只需角色，不读取密码哈希等其他列）
+    target_user = await User.filter(id=user_id).only("id", "role").first()
     if not target_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,31 @@
+from typing import Any, Dict, Optional
+
+from fastapi import status
+from fastapi.responses import ORJSONResponse
+
+from app.middleware.logging import get_request_timestamp
+
+
+def create_error_response(status_code: int, detail: str) -> ORJSONResponse:
+    """创建标准错误响应（直接返回响应对象，跳过StandardResponse模型的构造和校验）"""
+    return ORJSONResponse(content={
+        "code": status_code,
+        "message": detail,
+        "data": None,
+        "timestamp": get_request_timestamp()
+    })
+
+
+def ok(
+    data: Any = None,
+    message: str = "成功",
+    code: int = status.HTTP_200_OK,
+    headers: Optional[Dict[str, str]] = None
+) -> ORJSONResponse:
+    """创建标准成功响应（与错误响应一致直接返回响应对象，路由上的response_model仅用于生成文档）"""
+    return ORJSONResponse(content={
+        "code": code,
+        "message": message,
+        "data": data,
+        "timestamp": get_request_timestamp()
+    }, headers=headers)
@@ -9,7 +9,8 @@ from app.schemas.token import Token, RefreshToken, TokenResponse
 from app.core.security import create_access_token, create_refresh_token
 from app.core.config import settings
 from app.schemas.common import StandardResponse
-from jose import jwt, JWTError
+import jwt
+from jwt import InvalidTokenError
 
 router = APIRouter()
 
@@ -117,7 +118,7 @@ async def refresh_access_token(refresh_token_data: RefreshToken) -> Any:
             "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
         }
         
-    except JWTError:
+    except InvalidTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无效的刷新令牌",
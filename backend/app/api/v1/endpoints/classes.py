@@ -6,13 +6,17 @@ import io
 import pandas as pd
 
 from app.api.dependencies.auth import get_current_user, get_current_active_user
-from app.api.dependencies.permissions import check_is_admin, check_is_headteacher_or_admin, check_class_access
+from app.api.dependencies.permissions import (
+    check_is_admin, check_is_headteacher_or_admin, check_class_access,
+    invalidate_teacher_class_access_cache
+)
 from app.models.enums import UserRole
 from app.models.user import User
 from app.models.grade import Grade
 from app.models.class_model import Class
 from app.models.teacher import Teacher
 from app.models.student import Student
+from app.crud.crud_user import invalidate_user_profile_cache
 from app.schemas.common import StandardResponse, PaginatedResponse
 from app.utils.excel_utils import ExcelUtils
 
@@ -396,6 +400,7 @@ async def update_class(
             class_obj.capacity = capacity
         
         # 处理班主任
+        old_headteacher_id = class_obj.headteacher_id
         if headteacher_id is not None:
             if headteacher_id == 0:  # 特殊约定：0表示移除班主任
                 class_obj.headteacher_id = None
@@ -409,6 +414,13 @@ async def update_class(
                 class_obj.headteacher_id = headteacher_id
         
         await class_obj.save()
+        if headteacher_id is not None:
+            await invalidate_teacher_class_access_cache(class_id)
+            # 新旧班主任个人资料中的管理班级随之变化
+            headteacher_user_ids = await Teacher.filter(
+                id__in=[tid for tid in (old_headteacher_id, class_obj.headteacher_id) if tid]
+            ).values_list("user_id", flat=True)
+            await invalidate_user_profile_cache(*headteacher_user_ids)
         
         # 预加载关联数据以便返回
         await class_obj.fetch_related("grade")
@@ -532,6 +544,7 @@ async def add_teacher_to_class(
         
         # 添加关联
         await class_obj.teachers.add(teacher)
+        await invalidate_teacher_class_access_cache(class_id)
         
         return StandardResponse(
             code=status.HTTP_200_OK,
@@ -586,6 +599,7 @@ async def remove_teacher_from_class(
         
         # 移除关联
         await class_obj.teachers.remove(teacher)
+        await invalidate_teacher_class_access_cache(class_id)
         
         return StandardResponse(
             code=status.HTTP_200_OK,
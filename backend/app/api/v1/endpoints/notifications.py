@@ -1,4 +1,7 @@
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import base64
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body
 from tortoise.exceptions import DoesNotExist
@@ -15,10 +18,27 @@ from app.crud import crud_notification
 router = APIRouter()
 
 
+def encode_notification_cursor(notification: dict) -> str:
+    """将一页最后一条通知的创建时间和ID编码为游标"""
+    raw = f"{notification['created_at'].isoformat()}|{notification['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_notification_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析通知分页游标"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, notification_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
 @router.get("/", response_model=NotificationListResponse)
 async def read_notifications(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     is_read: Optional[bool] = None,
     type_filter: Optional[str] = None,
     include_all: bool = True,
@@ -26,33 +46,34 @@ async def read_notifications(
 ) -> Any:
     """
     获取当前用户的通知列表。
-    """
-    notifications = await crud_notification.get_user_notifications_with_details(
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        is_read=is_read,
-        type_filter=type_filter,
-        include_all=include_all
-    )
-    
-    total = await crud_notification.count_user_notifications(
-        user_id=current_user.id,
-        is_read=is_read,
-        type_filter=type_filter,
-        include_all=include_all
-    )
     
-    unread_count = await crud_notification.count_user_notifications(
-        user_id=current_user.id,
-        is_read=False,
-        include_all=include_all
+    传入cursor（上一页返回的next_cursor）时按游标分页，忽略skip。
+    """
+    after = decode_notification_cursor(cursor) if cursor else None
+    # 分页数据及总数与未读数互不依赖，并发查询
+    (notifications, total), unread_count = await asyncio.gather(
+        crud_notification.list_and_count(
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            after=after,
+            is_read=is_read,
+            type_filter=type_filter,
+            include_all=include_all,
+            with_details=True
+        ),
+        crud_notification.count_user_notifications(
+            user_id=current_user.id,
+            is_read=False,
+            include_all=include_all
+        )
     )
     
     return {
         "items": notifications,
         "total": total,
-        "unread_count": unread_count
+        "unread_count": unread_count,
+        "next_cursor": encode_notification_cursor(notifications[-1]) if len(notifications) == limit else None
     }
 
 
@@ -60,6 +81,7 @@ async def read_notifications(
 async def read_unread_notifications(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
@@ -68,6 +90,7 @@ async def read_unread_notifications(
     return await read_notifications(
         skip=skip,
         limit=limit,
+        cursor=cursor,
         is_read=False,
         current_user=current_user
     )
@@ -143,15 +166,15 @@ async def mark_as_read(
     """
     将通知标记为已读。
     """
-    notification = await crud_notification.mark_as_read(
+    updated_id = await crud_notification.mark_as_read(
         notification_id=notification_id, 
         user_id=current_user.id
     )
     
-    if not notification:
+    if not updated_id:
         raise HTTPException(status_code=404, detail="未找到该通知或无权限操作")
     
-    return await crud_notification.get_notification_with_details(notification_id=notification.id)
+    return await crud_notification.get_notification_with_details(notification_id=updated_id)
 
 
 @router.put("/mark-all-read", response_model=int)
@@ -172,30 +195,19 @@ async def delete_notification(
     """
     删除通知（软删除）。
     """
-    # 管理员可以删除任何通知
-    if current_user.is_superuser:
-        notification = await crud_notification.get_notification_with_details(notification_id=notification_id)
-        if not notification:
-            raise HTTPException(status_code=404, detail="未找到该通知")
-            
-        # 软删除通知
-        deleted_notification = await crud_notification.delete_notification(
-            notification_id=notification_id,
-            user_id=None  # 管理员可以删除任何通知
-        )
-        
-        return await crud_notification.get_notification_with_details(notification_id=notification_id)
+    # 删除后详情查询不再返回该通知，先取得详情作为返回值
+    notification = await crud_notification.get_notification_with_details(notification_id=notification_id)
     
-    # 普通用户只能删除自己的通知
-    notification = await crud_notification.delete_notification(
+    # 管理员可以删除任何通知，普通用户只能删除自己的通知
+    deleted_id = await crud_notification.delete_notification(
         notification_id=notification_id,
-        user_id=current_user.id
+        user_id=None if current_user.is_superuser else current_user.id
     )
     
-    if not notification:
+    if not notification or not deleted_id:
         raise HTTPException(status_code=404, detail="未找到该通知或无权限删除")
     
-    return await crud_notification.get_notification_with_details(notification_id=notification.id)
+    return {**notification, "is_deleted": True}
 
 
 @router.post("/system", response_model=Notification)
@@ -2,14 +2,20 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile
 from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
 import io
+import numpy as np
 import pandas as pd
 import urllib.parse
+from tortoise import Tortoise
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
 
 from app.api.dependencies.auth import get_current_user, get_current_active_user
 from app.api.dependencies.permissions import (
     check_is_admin, check_is_teacher_or_admin, check_is_headteacher_or_admin,
-    check_student_access, check_class_access, check_score_access
+    check_student_access, check_class_access, check_score_access,
+    can_teacher_access_class
 )
 from app.core.config import settings
 from app.models.enums import UserRole
@@ -19,6 +25,7 @@ from app.models.student import Student
 from app.models.subject import Subject
 from app.models.exam import Exam
 from app.models.class_model import Class
+from app.models.teacher import Teacher
 from app.schemas.score import (
     ScoreCreate, ScoreUpdate, ScoreInExam, 
     StudentScoreResponse, Score_Pydantic
@@ -28,6 +35,37 @@ from app.utils.excel_utils import ExcelUtils
 
 router = APIRouter()
 
+# 成绩导入Excel中需要读取的列，其余列在解析时直接跳过
+SCORE_IMPORT_COLUMNS = ["学号", "姓名", "分数", "评语"]
+
+# 按考试和学科重新计算成绩排名（并列同名次），一条语句完成全部更新
+RANKING_UPDATE_SQL = {
+    "mysql": (
+        "UPDATE scores s JOIN ("
+        "SELECT id, RANK() OVER (ORDER BY score DESC) AS rnk "
+        "FROM scores WHERE exam_id = %s AND subject_id = %s"
+        ") r ON s.id = r.id SET s.ranking = r.rnk"
+    ),
+    "postgres": (
+        "UPDATE scores s SET ranking = r.rnk FROM ("
+        "SELECT id, RANK() OVER (ORDER BY score DESC) AS rnk "
+        "FROM scores WHERE exam_id = $1 AND subject_id = $2"
+        ") r WHERE s.id = r.id"
+    ),
+}
+
+async def update_score_rankings(
+    exam_id: int,
+    subject_id: int,
+    connection: Optional[BaseDBAsyncClient] = None
+) -> None:
+    """重新计算指定考试、学科下所有成绩的排名，可传入事务连接"""
+    conn = connection or Tortoise.get_connection("default")
+    await conn.execute_query(
+        RANKING_UPDATE_SQL[conn.capabilities.dialect],
+        [exam_id, subject_id]
+    )
+
 # 错误处理函数
 def create_error_response(status_code: int, detail: str) -> StandardResponse:
     """创建标准错误响应"""
@@ -167,15 +205,15 @@ async def update_score(
     """
     try:
         # 检查成绩是否存在
-        score = await Score.get_or_none(id=score_id)
+        score = await Score.filter(id=score_id).select_related("student").first()
         if not score:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{score_id}的成绩记录"
             )
         
-        # 检查用户是否有权限修改该成绩
-        await check_score_access(score_id, current_user)
+        # 检查用户是否有权限修改该成绩（传入已查询的成绩对象，避免重复查询）
+        await check_score_access(score, current_user)
         
         # 管理员或者任课教师才能修改成绩
         if current_user.role != UserRole.ADMIN and current_user.role != UserRole.TEACHER:
@@ -185,7 +223,7 @@ async def update_score(
             )
         
         # 更新成绩
-        update_data = score_in.dict(exclude_unset=True, exclude_none=True)
+        update_data = score_in.model_dump(exclude_unset=True, exclude_none=True)
         for field, value in update_data.items():
             setattr(score, field, value)
             
@@ -229,15 +267,15 @@ async def delete_score(
     """
     try:
         # 检查成绩是否存在
-        score = await Score.get_or_none(id=score_id)
+        score = await Score.filter(id=score_id).select_related("student").first()
         if not score:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{score_id}的成绩记录"
             )
         
-        # 检查用户是否有权限删除该成绩
-        await check_score_access(score_id, current_user)
+        # 检查用户是否有权限删除该成绩（传入已查询的成绩对象，避免重复查询）
+        await check_score_access(score, current_user)
         
         # 只有管理员和任课教师才能删除成绩
         if current_user.role != UserRole.ADMIN and current_user.role != UserRole.TEACHER:
@@ -291,7 +329,7 @@ async def get_student_scores(
         await check_student_access(student_id, current_user)
         
         # 检查学生是否存在
-        student = await Student.get_or_none(id=student_id).prefetch_related("class_field")
+        student = await Student.filter(id=student_id).select_related("class_field").first()
         if not student:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -333,7 +371,7 @@ async def get_student_scores(
             "student_id": student.id,
             "student_name": student.name,
             "student_code": student.student_code,
-            "class_name": student.class_field.name if hasattr(student, "class_field") else "",
+            "class_name": student.class_field.name if student.class_field is not None else "",
             "scores": score_list,
             "total_score": total_score,
             "average_score": average_score,
@@ -378,9 +416,6 @@ async def get_class_scores(
     - 管理员：可以查看任何班级的成绩
     """
     try:
-        # 检查用户是否有权限访问该班级数据
-        await check_class_access(class_id, current_user)
-        
         # 检查班级是否存在
         class_obj = await Class.get_or_none(id=class_id)
         if not class_obj:
@@ -389,6 +424,9 @@ async def get_class_scores(
                 f"未找到ID为{class_id}的班级"
             )
         
+        # 检查用户是否有权限访问该班级数据（传入已查询的班级对象）
+        await check_class_access(class_obj, current_user)
+        
         # 检查考试是否存在
         exam = await Exam.get_or_none(id=exam_id)
         if not exam:
@@ -624,7 +662,7 @@ async def export_class_scores(
             
             # 如果是年级导出，添加班级信息
             if is_grade_export:
-                row["班级"] = student.class_field.name if hasattr(student, "class_field") and student.class_field else ""
+                row["班级"] = student.class_field.name if student.class_field is not None else ""
             
             # 添加总分和排名字段
             row["总分"] = 0
@@ -927,8 +965,13 @@ async def import_scores(
     - 学生：无权导入成绩
     """
     try:
+        # 并发查询考试和班级
+        exam, class_obj = await asyncio.gather(
+            Exam.get_or_none(id=exam_id).prefetch_related("subject"),
+            Class.get_or_none(id=class_id)
+        )
+        
         # 检查考试是否存在
-        exam = await Exam.get_or_none(id=exam_id).prefetch_related("subject")
         if not exam:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -936,7 +979,6 @@ async def import_scores(
             )
         
         # 检查班级是否存在
-        class_obj = await Class.get_or_none(id=class_id)
         if not class_obj:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -948,10 +990,7 @@ async def import_scores(
             teacher = await current_user.teacher
             if teacher:
                 # 检查是否有权限访问该班级
-                is_teaching = await class_obj.teachers.filter(id=teacher.id).exists()
-                is_headteacher = class_obj.headteacher_id == teacher.id
-                
-                if not (is_teaching or is_headteacher):
+                if not await can_teacher_access_class(current_user.id, class_id):
                     return create_error_response(
                         status.HTTP_403_FORBIDDEN,
                         "您没有权限为该班级导入成绩"
@@ -1003,7 +1042,15 @@ async def import_scores(
         
         # 读取Excel文件
         try:
-            df = pd.read_excel(file.file.read())
+            content = await file.read()
+            # Excel解析是CPU密集的同步操作，放到线程池中执行，避免阻塞事件循环
+            df = await asyncio.to_thread(
+                pd.read_excel,
+                io.BytesIO(content),
+                engine=ExcelUtils.get_engine(file.filename),
+                usecols=lambda column: column in SCORE_IMPORT_COLUMNS,
+                dtype={"学号": str, "姓名": str, "评语": str}
+            )
         except Exception as e:
             return create_error_response(
                 status.HTTP_400_BAD_REQUEST,
@@ -1019,30 +1066,39 @@ async def import_scores(
                 f"Excel文件缺少必填列: {', '.join(missing_columns)}"
             )
         
-        # 验证分数列是否有效
-        def validate_score(score):
-            if pd.isna(score):
-                return "分数不能为空"
-            try:
-                float_score = float(score)
-                if float_score < 0 or float_score > target_exam.total_score:
-                    return f"分数应在0-{target_exam.total_score}之间"
-            except ValueError:
-                return "分数应为数字"
-            return True
-        
-        # 验证数据
-        df["验证"] = df["分数"].apply(validate_score)
-        invalid_rows = df[df["验证"] != True]
-        
-        if not invalid_rows.empty:
+        # 验证分数列是否有效（向量化校验，错误以int8编码存储，0表示合法）
+        raw_scores = df["分数"]
+        numeric_scores = pd.to_numeric(raw_scores, errors="coerce")
+        error_codes = np.select(
+            [
+                raw_scores.isna(),
+                numeric_scores.isna(),
+                (numeric_scores < 0) | (numeric_scores > target_exam.total_score)
+            ],
+            [1, 2, 3],
+            default=0
+        ).astype(np.int8)
+        invalid_mask = error_codes != 0
+        
+        if invalid_mask.any():
+            # 仅对出错的行把错误编码转换为错误信息
+            error_messages = {
+                1: "分数不能为空",
+                2: "分数应为数字",
+                3: f"分数应在0-{target_exam.total_score}之间"
+            }
+            invalid_rows = df.loc[invalid_mask, ["学号", "姓名"]]
             errors = []
-            for index, row in invalid_rows.iterrows():
+            for index, (student_code, name), error_code in zip(
+                invalid_rows.index,
+                invalid_rows.itertuples(index=False, name=None),
+                error_codes[invalid_mask]
+            ):
                 errors.append({
                     "row": index + 2,  # Excel行从1开始，标题行为1
-                    "student_code": row["学号"],
-                    "name": row["姓名"],
-                    "error": row["验证"]
+                    "student_code": student_code,
+                    "name": name,
+                    "error": error_messages[int(error_code)]
                 })
             
             return StandardResponse(
@@ -1052,50 +1108,77 @@ async def import_scores(
                 timestamp=datetime.now()
             )
         
-        # 获取班级学生
-        students = await Student.filter(class_field_id=class_id)
-        student_dict = {student.student_code: student for student in students}
+        # 获取班级学生（只查询学号和ID）
+        students = await Student.filter(class_field_id=class_id).values("id", "student_code")
+        student_ids_by_code = {student["student_code"]: student["id"] for student in students}
+        
+        # 一次性查询这些学生在目标考试中的已有成绩，避免逐行查询
+        existing_scores = await Score.filter(
+            exam_id=target_exam.id,
+            subject_id=target_exam.subject_id,
+            student_id__in=list(student_ids_by_code.values())
+        )
+        existing_by_student_id = {score.student_id: score for score in existing_scores}
+        
+        # 统一将学号转为字符串，一次性找出不存在或不属于该班级的学号
+        df["学号"] = df["学号"].astype(str)
+        missing_mask = ~df["学号"].isin(list(student_ids_by_code))
+        missing_rows = df.loc[missing_mask]
+        error_details = [
+            {
+                "row": index + 2,
+                "student_code": student_code,
+                "name": name,
+                "error": "学号不存在或不属于该班级"
+            }
+            for index, student_code, name in zip(missing_rows.index, missing_rows["学号"], missing_rows["姓名"])
+        ]
         
-        # 导入成绩
+        # 导入成绩：先逐行整理待新增/待更新的成绩，再批量写入数据库
         success_count = 0
-        error_count = 0
-        error_details = []
+        error_count = len(error_details)
+        # 按学生ID记录待写入的成绩，同一学号在文件中出现多次时以最后一行为准
+        scores_to_create = {}
+        scores_to_update = {}
+        scores_changed = False  # 是否有已存在成绩的分数发生变化（决定是否需要重新排名）
+        
+        valid_rows = df.loc[~missing_mask]
+        valid_values = valid_rows[["学号", "姓名", "分数"]].itertuples(index=False, name=None)
+        # 评语列一次性转换为数组，没有该列时不修改已有评语
+        if "评语" in df.columns:
+            comments_values = valid_rows["评语"].fillna("").to_numpy()
+        else:
+            comments_values = [None] * len(valid_rows)
         
-        for index, row in df.iterrows():
+        for index, (student_code, name, raw_score), comments in zip(valid_rows.index, valid_values, comments_values):
             try:
-                student_code = str(row["学号"])
-                student = student_dict.get(student_code)
-                
-                if not student:
-                    error_count += 1
-                    error_details.append({
-                        "row": index + 2,
-                        "student_code": student_code,
-                        "name": row["姓名"],
-                        "error": "学号不存在或不属于该班级"
-                    })
-                    continue
+                student_id = student_ids_by_code[student_code]
                 
                 # 检查成绩是否已存在
-                existing_score = await Score.filter(
-                    student_id=student.id,
-                    exam_id=target_exam.id,
-                    subject_id=target_exam.subject_id
-                ).first()
+                existing_score = existing_by_student_id.get(student_id)
                 
-                score_value = float(row["分数"])
-                comments = row.get("评语", "") if "评语" in row else None
+                score_value = float(raw_score)
                 
                 if existing_score:
-                    # 更新现有成绩
-                    existing_score.score = score_value
+                    # 更新现有成绩，内容未变化的成绩不再写入
+                    score_changed = existing_score.score != score_value
+                    comments_changed = comments is not None and existing_score.comments != comments
+                    if score_changed or comments_changed:
+                        existing_score.score = score_value
+                        if comments is not None:
+                            existing_score.comments = comments
+                        scores_to_update[student_id] = existing_score
+                        scores_changed = scores_changed or score_changed
+                elif student_id in scores_to_create:
+                    # 文件中重复的学号，更新本次导入中待新增的成绩
+                    pending_score = scores_to_create[student_id]
+                    pending_score.score = score_value
                     if comments is not None:
-                        existing_score.comments = comments
-                    await existing_score.save()
+                        pending_score.comments = comments
                 else:
                     # 创建新成绩
-                    await Score.create(
-                        student_id=student.id,
+                    scores_to_create[student_id] = Score(
+                        student_id=student_id,
                         exam_id=target_exam.id,
                         subject_id=target_exam.subject_id,
                         score=score_value,
@@ -1107,28 +1190,24 @@ async def import_scores(
                 error_count += 1
                 error_details.append({
                     "row": index + 2,
-                    "student_code": row.get("学号", ""),
-                    "name": row.get("姓名", ""),
+                    "student_code": student_code,
+                    "name": name,
                     "error": str(e)
                 })
         
-        # 计算排名
-        if success_count > 0:
-            # 获取该考试该科目的所有成绩
-            scores = await Score.filter(
-                exam_id=target_exam.id,
-                subject_id=target_exam.subject_id
-            ).order_by("-score")
-            
-            # 计算排名
-            current_rank = 1
-            current_score = None
-            for i, score in enumerate(scores):
-                if current_score != score.score:
-                    current_rank = i + 1
-                    current_score = score.score
-                score.ranking = current_rank
-                await score.save()
+        # 在同一事务中批量写入成绩并计算排名，只提交一次
+        if scores_to_create or scores_to_update:
+            async with in_transaction() as conn:
+                if scores_to_create:
+                    await Score.bulk_create(list(scores_to_create.values()), batch_size=1000, using_db=conn)
+                if scores_to_update:
+                    await Score.bulk_update(
+                        list(scores_to_update.values()), fields=["score", "comments"], batch_size=1000, using_db=conn
+                    )
+                
+                # 计算排名：没有新增成绩且分数均未变化时（如只改评语或重复导入）排名不变，跳过
+                if scores_to_create or scores_changed:
+                    await update_score_rankings(target_exam.id, target_exam.subject_id, connection=conn)
         
         return StandardResponse(
             code=status.HTTP_200_OK,
@@ -1165,8 +1244,16 @@ async def get_score_import_template(
     - 学生：无权获取导入模板
     """
     try:
+        # 并发查询班级和学科（未指定学科时不查询）
+        async def get_subject() -> Optional[Subject]:
+            return await Subject.get_or_none(id=subject_id) if subject_id else None
+        
+        class_obj, subject = await asyncio.gather(
+            Class.get_or_none(id=class_id).prefetch_related("grade"),
+            get_subject()
+        )
+        
         # 检查班级是否存在
-        class_obj = await Class.get_or_none(id=class_id).prefetch_related("grade")
         if not class_obj:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -1183,16 +1270,14 @@ async def get_score_import_template(
                 )
                 
             # 检查是否为该班级的任课教师或班主任
-            is_headteacher = class_obj.headteacher_id == teacher.id
-            is_teaching = await teacher.teaching_classes.filter(id=class_id).exists()
-            
-            if not (is_headteacher or is_teaching):
+            if not await can_teacher_access_class(current_user.id, class_id):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="您不是该班级的任课教师或班主任，无权获取导入模板"
                 )
                 
             # 如果指定了学科，检查是否教授该学科
+            is_headteacher = class_obj.headteacher_id == teacher.id
             if subject_id and teacher.subject_id != subject_id and not is_headteacher:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -1204,19 +1289,15 @@ async def get_score_import_template(
                 detail="学生无权获取成绩导入模板"
             )
         
-        # 获取班级学生
-        students = await Student.filter(class_field_id=class_id).order_by("student_code")
+        # 获取班级学生，只查询模板需要的学号和姓名，直接构造DataFrame
+        students = await Student.filter(class_field_id=class_id).order_by("student_code").values("student_code", "name")
         
         # 准备模板数据
-        data = []
-        for student in students:
-            student_data = {
-                "学号": student.student_code,
-                "姓名": student.name,
-                "分数": "",
-                "评语": ""
-            }
-            data.append(student_data)
+        data = pd.DataFrame(students, columns=["student_code", "name"]).rename(
+            columns={"student_code": "学号", "name": "姓名"}
+        )
+        data["分数"] = ""
+        data["评语"] = ""
         
         # 定义列
         columns = [
@@ -1231,12 +1312,10 @@ async def get_score_import_template(
         class_name = f"{grade_name}{class_obj.name}" if grade_name else class_obj.name
         
         title = f"{class_name}成绩导入模板"
-        if subject_id:
-            subject = await Subject.get_or_none(id=subject_id)
-            if subject:
-                title = f"{class_name}{subject.name}成绩导入模板"
+        if subject:
+            title = f"{class_name}{subject.name}成绩导入模板"
         
-        output = ExcelUtils.write_excel(data, columns, title)
+        output = await asyncio.to_thread(ExcelUtils.write_excel, data, columns, title)
         
         # 生成文件名
         now = datetime.now().strftime("%Y%m%d%H%M%S")
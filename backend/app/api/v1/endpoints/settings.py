@@ -4,8 +4,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Path
 
 from app.crud import (
     get_by_id, get_by_key, get_by_keys, get_by_group, get_all_public,
-    create, update, create_or_update, delete, get_multi,
-    get_multi_by_filter, count_by_filter
+    create, update, update_by_key, create_or_update, bulk_create_or_update,
+    delete, delete_by_key, get_multi,
+    get_multi_by_filter, count_by_filter, get_page
 )
 from app.api.dependencies.auth import get_current_user, get_admin_user
 from app.models.user import User
@@ -28,7 +29,7 @@ async def read_settings(
     """
     获取系统设置列表。
     """
-    settings = await get_multi_by_filter(
+    settings, total = await get_page(
         skip=skip, 
         limit=limit, 
         group=group,
@@ -36,12 +37,6 @@ async def read_settings(
         is_system=is_system,
         search=search
     )
-    total = await count_by_filter(
-        group=group,
-        is_public=is_public,
-        is_system=is_system,
-        search=search
-    )
     return {"items": settings, "total": total}
 
 
@@ -98,7 +93,8 @@ async def create_setting(
             status_code=400,
             detail=f"键名为 '{setting_in.key}' 的设置已存在"
         )
-    return await create(obj_in=setting_in)
+    setting = await create(obj_in=setting_in)
+    return setting
 
 
 @router.put("/{key}", response_model=Setting)
@@ -111,18 +107,12 @@ async def update_setting(
     """
     更新系统设置。
     """
-    setting = await get_by_key(key=key)
+    # 直接按键名更新（系统设置标志不会被修改），再读取更新后的设置
+    setting = await update_by_key(key=key, obj_in=setting_in)
     if not setting:
         raise HTTPException(status_code=404, detail="未找到该设置")
     
-    # 如果是系统设置，不能修改系统设置标志
-    if setting.is_system:
-        return await update(id=setting.id, obj_in={
-            **setting_in.dict(exclude_unset=True),
-            "is_system": True  # 确保系统设置标志不被修改
-        })
-    
-    return await update(id=setting.id, obj_in=setting_in)
+    return setting
 
 
 @router.delete("/{key}", response_model=Setting)
@@ -134,23 +124,15 @@ async def delete_setting(
     """
     删除系统设置。
     """
-    setting = await get_by_key(key=key)
+    # 直接删除，返回被删除的设置；系统设置不会被删除
+    setting = await delete_by_key(key=key)
     if not setting:
         raise HTTPException(status_code=404, detail="未找到该设置")
     
-    # 系统设置不允许删除
     if setting.is_system:
         raise HTTPException(status_code=400, detail="系统设置不允许删除")
     
-    # 保存设置信息以便返回
-    setting_copy = setting
-    
-    # 删除设置
-    success = await delete(id=setting.id)
-    if not success:
-        raise HTTPException(status_code=500, detail="删除设置失败")
-    
-    return setting_copy
+    return setting
 
 
 @router.post("/batch", response_model=List[Setting])
@@ -162,7 +144,5 @@ async def batch_update_settings(
     """
     批量创建或更新系统设置。
     """
-    result = []
-    for setting_in in settings_in:
-        result.append(await create_or_update(obj_in=setting_in))
+    result = await bulk_create_or_update(objs_in=settings_in)
     return result 
\ No newline at end of file
@@ -2,25 +2,55 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status, Body, Uplo
 from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
 import io
+import numpy as np
 import pandas as pd
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
 
 from app.api.dependencies.auth import get_current_user, get_current_active_user
 from app.api.dependencies.permissions import (
     check_is_admin, check_is_teacher_or_admin, check_is_headteacher_or_admin,
-    check_student_access
+    check_student_access, can_teacher_access_class, teacher_class_ids_subquery
 )
 from app.models.enums import UserRole
 from app.models.user import User
 from app.models.student import Student
 from app.models.class_model import Class
 from app.models.score import Score
+from app.crud.crud_user import invalidate_user_profile_cache
 from app.schemas.common import StandardResponse, PaginatedResponse
 from app.schemas.student import StudentCreate, StudentUpdate, StudentResponse
-from app.utils.excel_utils import ExcelUtils
+from app.utils.excel_utils import ExcelUtils, ExcelRowWriter
+from app.middleware.logging import get_request_timestamp
 
 router = APIRouter()
 
+# 学生响应的基础字段（列表接口配合values()投影，只查询需要的列）
+STUDENT_LIST_FIELDS = (
+    "id", "name", "student_code", "gender", "birth_date",
+    "address", "phone", "parent_name", "parent_phone"
+)
+
+# 学生导出Excel使用的字段
+STUDENT_EXPORT_FIELDS = (
+    "student_code", "name", "gender", "birth_date",
+    "phone", "parent_name", "parent_phone", "address"
+)
+
+# 导出时每批读取的学生数量
+STUDENT_EXPORT_BATCH_SIZE = 1000
+
+def student_to_dict(student: Student) -> Dict[str, Any]:
+    """将已预加载班级（及年级）的学生对象转换为响应字典"""
+    student_data = {field: getattr(student, field) for field in STUDENT_LIST_FIELDS}
+    student_data["class_id"] = student.class_field.id
+    student_data["class_name"] = student.class_field.name
+    grade = getattr(student.class_field, "grade", None)
+    student_data["grade_name"] = grade.name if grade is not None else ""
+    return student_data
+
 # 错误处理函数
 def create_error_response(status_code: int, detail: str) -> StandardResponse:
     """创建标准错误响应"""
@@ -28,9 +58,32 @@ def create_error_response(status_code: int, detail: str) -> StandardResponse:
         code=status_code,
         message=detail,
         data=None,
-        timestamp=datetime.now()
+        timestamp=get_request_timestamp()
     )
 
+async def check_teacher_empty_class(
+    current_user: User,
+    class_id: int,
+    class_exists: Optional[bool] = None
+) -> Optional[StandardResponse]:
+    """
+    教师按班级查询学生结果为空时调用：班级不存在返回404，无权限返回403，
+    有权限（班级确实没有匹配的学生）返回None
+    """
+    if class_exists is None:
+        class_exists = await Class.filter(id=class_id).exists()
+    if not class_exists:
+        return create_error_response(
+            status.HTTP_404_NOT_FOUND, 
+            f"未找到ID为{class_id}的班级"
+        )
+    if not await can_teacher_access_class(current_user.id, class_id):
+        return create_error_response(
+            status.HTTP_403_FORBIDDEN, 
+            "您没有权限访问该班级的学生"
+        )
+    return None
+
 @router.post("/", response_model=StandardResponse, summary="创建学生信息")
 async def create_student(
     student_data: StudentCreate,
@@ -55,16 +108,23 @@ async def create_student(
     - 班主任/教师/学生：无权创建学生信息
     """
     try:
+        # 并发执行相互独立的存在性检查
+        # 仅需判断存在与否的检查使用exists()，不读取整行
+        user_exists, class_obj, existing_student, existing_student_user = await asyncio.gather(
+            User.exists(id=student_data.user_id),
+            Class.get_or_none(id=student_data.class_field),
+            Student.exists(student_code=student_data.student_code),
+            Student.exists(user_id=student_data.user_id)
+        )
+        
         # 检查用户是否存在
-        user = await User.get_or_none(id=student_data.user_id)
-        if not user:
+        if not user_exists:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{student_data.user_id}的用户"
             )
         
         # 检查班级是否存在
-        class_obj = await Class.get_or_none(id=student_data.class_field)
         if not class_obj:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -72,7 +132,6 @@ async def create_student(
             )
         
         # 检查学号是否已存在
-        existing_student = await Student.get_or_none(student_code=student_data.student_code)
         if existing_student:
             return create_error_response(
                 status.HTTP_409_CONFLICT, 
@@ -80,7 +139,6 @@ async def create_student(
             )
         
         # 检查用户是否已关联学生
-        existing_student_user = await Student.get_or_none(user_id=student_data.user_id)
         if existing_student_user:
             return create_error_response(
                 status.HTTP_409_CONFLICT, 
@@ -100,32 +158,19 @@ async def create_student(
             user_id=student_data.user_id,
             class_field_id=student_data.class_field
         )
+        await invalidate_user_profile_cache(student.user_id)
         
         # 预加载关联数据以便返回
-        await student.fetch_related("class_field")
-        await student.class_field.fetch_related("grade")
+        await student.fetch_related("class_field__grade")
         
         # 准备响应数据
-        student_data = {
-            "id": student.id,
-            "name": student.name,
-            "student_code": student.student_code,
-            "gender": student.gender,
-            "birth_date": student.birth_date,
-            "address": student.address,
-            "phone": student.phone,
-            "parent_name": student.parent_name,
-            "parent_phone": student.parent_phone,
-            "class_id": student.class_field.id,
-            "class_name": student.class_field.name,
-            "grade_name": student.class_field.grade.name if hasattr(student.class_field, "grade") else ""
-        }
+        student_data = student_to_dict(student)
         
         return StandardResponse(
             code=status.HTTP_201_CREATED,
             message="学生创建成功",
             data=student_data,
-            timestamp=datetime.now()
+            timestamp=get_request_timestamp()
         )
     except Exception as e:
         return create_error_response(
@@ -157,75 +202,41 @@ async def get_students(
     """
     try:
         # 构建查询
-        query = Student.all().prefetch_related("class_field")
+        query = Student.all()
         
         # 班级筛选
         if class_id:
             query = query.filter(class_field_id=class_id)
             
-            # 如果当前用户是教师且不是班主任，检查权限
+            # 如果当前用户是教师且不是班主任，将访问权限作为查询条件，无权限时查询结果为空
             if current_user.role == UserRole.TEACHER:
-                # 检查教师是否有权限访问该班级
-                class_obj = await Class.get_or_none(id=class_id)
-                if class_obj:
-                    # 获取教师信息
-                    teacher = await current_user.teacher
-                    if teacher:
-                        # 检查是否是班主任或任课教师
-                        is_headteacher = await class_obj.headteacher.filter(id=teacher.id).exists()
-                        is_teaching = await class_obj.teachers.filter(id=teacher.id).exists()
-                        if not (is_headteacher or is_teaching):
-                            return create_error_response(
-                                status.HTTP_403_FORBIDDEN, 
-                                "您没有权限访问该班级的学生"
-                            )
-                    else:
-                        return create_error_response(
-                            status.HTTP_403_FORBIDDEN, 
-                            "教师信息不存在"
-                        )
-                else:
-                    return create_error_response(
-                        status.HTTP_404_NOT_FOUND, 
-                        f"未找到ID为{class_id}的班级"
-                    )
+                query = query.filter(class_field_id__in=teacher_class_ids_subquery(current_user.id))
         
         # 关键词搜索
         if search:
             query = query.filter(
-                name__icontains=search
-            ) | query.filter(
-                student_code__icontains=search
+                Q(name__icontains=search) | Q(student_code__icontains=search)
             )
         
-        # 计算总数
-        total = await query.count()
+        # 并发计算总数和分页查询，只投影需要的列，班级和年级名称通过JOIN直接取出
+        total, students = await asyncio.gather(
+            query.count(),
+            query.order_by("student_code").offset((page - 1) * page_size).limit(page_size).values(
+                *STUDENT_LIST_FIELDS,
+                class_id="class_field_id",
+                class_name="class_field__name",
+                grade_name="class_field__grade__name"
+            )
+        )
         
-        # 分页查询
-        students = await query.order_by("student_code").offset((page - 1) * page_size).limit(page_size)
+        # 教师查询结果为空时，区分班级不存在、无权限和确实没有学生三种情况
+        if not total and class_id and current_user.role == UserRole.TEACHER:
+            error_response = await check_teacher_empty_class(current_user, class_id)
+            if error_response:
+                return error_response
         
         # 准备响应数据
-        student_list = []
-        for student in students:
-            # 预加载班级的年级信息
-            if hasattr(student.class_field, "grade"):
-                await student.class_field.fetch_related("grade")
-            
-            student_data = {
-                "id": student.id,
-                "name": student.name,
-                "student_code": student.student_code,
-                "gender": student.gender,
-                "birth_date": student.birth_date,
-                "address": student.address,
-                "phone": student.phone,
-                "parent_name": student.parent_name,
-                "parent_phone": student.parent_phone,
-                "class_id": student.class_field.id,
-                "class_name": student.class_field.name,
-                "grade_name": student.class_field.grade.name if hasattr(student.class_field, "grade") else ""
-            }
-            student_list.append(student_data)
+        student_list = [{**student, "grade_name": student["grade_name"] or ""} for student in students]
         
         # 创建分页响应
         paginated_response = {
@@ -240,7 +251,7 @@ async def get_students(
             code=status.HTTP_200_OK,
             message="获取学生列表成功",
             data=paginated_response,
-            timestamp=datetime.now()
+            timestamp=get_request_timestamp()
         )
     except Exception as e:
         return create_error_response(
@@ -265,12 +276,11 @@ async def get_student(
     - 管理员：可以查看任何学生的详情
     """
     try:
-        # 检查权限
-        await check_student_access(student_id, current_user)
-        
-        # 获取学生信息及关联数据
-        student = await Student.get_or_none(id=student_id).prefetch_related(
-            "user", "class_field__grade"
+        # 权限检查、学生信息及成绩三者互不依赖，并发执行（权限不足时抛出异常，查询结果被丢弃）
+        _, student, scores = await asyncio.gather(
+            check_student_access(student_id, current_user),
+            Student.get_or_none(id=student_id).prefetch_related("user", "class_field__grade"),
+            Score.filter(student_id=student_id).prefetch_related("subject", "exam")
         )
         
         if not student:
@@ -279,16 +289,9 @@ async def get_student(
                 f"未找到ID为{student_id}的学生"
             )
         
-        # 一次性获取所有成绩与相关联数据
-        scores = await Score.filter(student_id=student_id).prefetch_related("subject", "exam")
-        
         # 组织成绩数据按考试分组
         exam_scores = {}
         
-        # 预先获取所有可能用到的考试和学科
-        exam_ids = list(set(score.exam_id for score in scores))
-        subject_ids = list(set(score.subject_id for score in scores))
-        
         # 组织数据
         for score in scores:
             exam_id = score.exam_id
@@ -311,20 +314,9 @@ async def get_student(
         
         # 准备响应数据
         student_data = {
-            "id": student.id,
-            "name": student.name,
-            "student_code": student.student_code,
-            "gender": student.gender,
-            "birth_date": student.birth_date,
-            "address": student.address,
-            "phone": student.phone,
-            "parent_name": student.parent_name,
-            "parent_phone": student.parent_phone,
+            **student_to_dict(student),
             "user_id": student.user_id,
             "username": student.user.username,
-            "class_id": student.class_field.id,
-            "class_name": student.class_field.name,
-            "grade_name": student.class_field.grade.name if hasattr(student.class_field, "grade") else "",
             "exam_scores": list(exam_scores.values())
         }
         
@@ -332,7 +324,7 @@ async def get_student(
             code=status.HTTP_200_OK,
             message="获取学生详情成功",
             data=student_data,
-            timestamp=datetime.now()
+            timestamp=get_request_timestamp()
         )
     except HTTPException as e:
         return create_error_response(
@@ -380,63 +372,60 @@ async def update_student(
                 f"未找到ID为{student_id}的学生"
             )
         
-        # 检查学号是否已存在（如果修改了学号）
-        if student_data.student_code and student_data.student_code != student.student_code:
-            existing_student = await Student.get_or_none(student_code=student_data.student_code)
-            if existing_student and existing_student.id != student_id:
-                return create_error_response(
-                    status.HTTP_409_CONFLICT, 
-                    f"学号为{student_data.student_code}的学生已存在"
-                )
+        # 并发检查学号是否已存在（如果修改了学号）和班级是否存在（如果修改了班级）
+        code_changed = bool(student_data.student_code) and student_data.student_code != student.student_code
+        class_changed = bool(student_data.class_field) and student_data.class_field != student.class_field_id
         
-        # 检查班级是否存在（如果修改了班级）
-        if student_data.class_field and student_data.class_field != student.class_field_id:
-            class_obj = await Class.get_or_none(id=student_data.class_field)
-            if not class_obj:
-                return create_error_response(
-                    status.HTTP_404_NOT_FOUND, 
-                    f"未找到ID为{student_data.class_field}的班级"
-                )
+        async def get_existing_student() -> Optional[Student]:
+            if not code_changed:
+                return None
+            return await Student.get_or_none(student_code=student_data.student_code)
+        
+        async def get_class() -> Optional[Class]:
+            if not class_changed:
+                return None
+            return await Class.get_or_none(id=student_data.class_field)
+        
+        existing_student, class_obj = await asyncio.gather(get_existing_student(), get_class())
+        
+        if existing_student and existing_student.id != student_id:
+            return create_error_response(
+                status.HTTP_409_CONFLICT, 
+                f"学号为{student_data.student_code}的学生已存在"
+            )
+        
+        if class_changed and not class_obj:
+            return create_error_response(
+                status.HTTP_404_NOT_FOUND, 
+                f"未找到ID为{student_data.class_field}的班级"
+            )
         
         # 更新学生信息
-        update_data = student_data.dict(exclude_unset=True, exclude_none=True)
+        update_data = student_data.model_dump(exclude_unset=True, exclude_none=True)
         
         # 处理class_field特殊字段
         if "class_field" in update_data:
             update_data["class_field_id"] = update_data.pop("class_field")
         
-        # 应用更新
+        # 应用更新（关联用户可能被修改，新旧用户的个人资料缓存都需要清除）
+        old_user_id = student.user_id
         for field, value in update_data.items():
             setattr(student, field, value)
         
         await student.save()
+        await invalidate_user_profile_cache(old_user_id, student.user_id)
         
         # 预加载关联数据以便返回
-        await student.fetch_related("class_field")
-        if hasattr(student.class_field, "grade"):
-            await student.class_field.fetch_related("grade")
+        await student.fetch_related("class_field__grade")
         
         # 准备响应数据
-        student_data = {
-            "id": student.id,
-            "name": student.name,
-            "student_code": student.student_code,
-            "gender": student.gender,
-            "birth_date": student.birth_date,
-            "address": student.address,
-            "phone": student.phone,
-            "parent_name": student.parent_name,
-            "parent_phone": student.parent_phone,
-            "class_id": student.class_field.id,
-            "class_name": student.class_field.name,
-            "grade_name": student.class_field.grade.name if hasattr(student.class_field, "grade") else ""
-        }
+        student_data = student_to_dict(student)
         
         return StandardResponse(
             code=status.HTTP_200_OK,
             message="学生信息更新成功",
             data=student_data,
-            timestamp=datetime.now()
+            timestamp=get_request_timestamp()
         )
     except Exception as e:
         return create_error_response(
@@ -467,9 +456,9 @@ async def delete_student(
                 f"未找到ID为{student_id}的学生"
             )
         
-        # 检查是否有成绩关联
-        score_count = await Score.filter(student_id=student_id).count()
-        if score_count > 0:
+        # 检查是否有成绩关联（EXISTS命中第一条即返回，仅在需要提示时再统计条数）
+        if await Score.filter(student_id=student_id).exists():
+            score_count = await Score.filter(student_id=student_id).count()
             return create_error_response(
                 status.HTTP_400_BAD_REQUEST, 
                 f"无法删除学生，该学生有{score_count}条成绩记录"
@@ -480,6 +469,7 @@ async def delete_student(
         
         # 删除学生
         await student.delete()
+        await invalidate_user_profile_cache(user_id)
         
         # 可选：同时删除关联的用户账号
         # await User.filter(id=user_id).delete()
@@ -488,7 +478,7 @@ async def delete_student(
             code=status.HTTP_200_OK,
             message="学生删除成功",
             data=None,
-            timestamp=datetime.now()
+            timestamp=get_request_timestamp()
         )
     except Exception as e:
         return create_error_response(
@@ -516,74 +506,22 @@ async def export_students(
     """
     try:
         # 构建查询
-        query = Student.all().prefetch_related("class_field")
+        query = Student.all()
         
         # 班级筛选
         if class_id:
             query = query.filter(class_field_id=class_id)
             
-            # 如果当前用户是教师且不是班主任，检查权限
+            # 如果当前用户是教师且不是班主任，将访问权限作为查询条件，无权限时查询结果为空
             if current_user.role == UserRole.TEACHER:
-                # 检查教师是否有权限访问该班级
-                class_obj = await Class.get_or_none(id=class_id)
-                if class_obj:
-                    # 获取教师信息
-                    teacher = await current_user.teacher
-                    if teacher:
-                        # 检查是否是班主任或任课教师
-                        is_headteacher = await class_obj.headteacher.filter(id=teacher.id).exists()
-                        is_teaching = await class_obj.teachers.filter(id=teacher.id).exists()
-                        if not (is_headteacher or is_teaching):
-                            return create_error_response(
-                                status.HTTP_403_FORBIDDEN, 
-                                "您没有权限访问该班级的学生"
-                            )
-                    else:
-                        return create_error_response(
-                            status.HTTP_403_FORBIDDEN, 
-                            "教师信息不存在"
-                        )
-                else:
-                    return create_error_response(
-                        status.HTTP_404_NOT_FOUND, 
-                        f"未找到ID为{class_id}的班级"
-                    )
+                query = query.filter(class_field_id__in=teacher_class_ids_subquery(current_user.id))
         
         # 关键词搜索
         if search:
             query = query.filter(
-                name__icontains=search
-            ) | query.filter(
-                student_code__icontains=search
+                Q(name__icontains=search) | Q(student_code__icontains=search)
             )
         
-        # 获取学生列表
-        students = await query.order_by("student_code")
-        
-        # 准备导出数据
-        data = []
-        for student in students:
-            # 预加载班级的年级信息
-            if hasattr(student.class_field, "grade"):
-                await student.class_field.fetch_related("grade")
-            
-            grade_name = student.class_field.grade.name if hasattr(student.class_field, "grade") and hasattr(student.class_field.grade, "name") else ""
-            class_name = student.class_field.name if hasattr(student.class_field, "name") else ""
-            
-            student_data = {
-                "id": student.id,
-                "student_code": student.student_code,
-                "name": student.name,
-                "gender": student.gender or "",
-                "birth_date": student.birth_date or "",
-                "class_name": f"{grade_name}{class_name}",
-                "phone": student.phone or "",
-                "parent_name": student.parent_name or "",
-                "parent_phone": student.parent_phone or "",
-                "address": student.address or "",
-            }
-            data.append(student_data)
-        
         # 定义列映射
         columns = [
             ("student_code", "学号"),
@@ -597,18 +535,57 @@ async def export_students(
             ("address", "家庭住址")
         ]
         
+        async def fetch_batch(last_code: Optional[str]) -> List[Dict[str, Any]]:
+            batch_query = query if last_code is None else query.filter(student_code__gt=last_code)
+            return await batch_query.order_by("student_code").limit(STUDENT_EXPORT_BATCH_SIZE).values(
+                *STUDENT_EXPORT_FIELDS,
+                class_name="class_field__name",
+                grade_name="class_field__grade__name"
+            )
+        
+        async def get_class() -> Optional[Class]:
+            if not class_id:
+                return None
+            return await Class.get_or_none(id=class_id).prefetch_related("grade")
+        
+        # 并发获取标题所需的班级信息和第一批学生
+        class_obj, students = await asyncio.gather(get_class(), fetch_batch(None))
+        
+        # 教师查询结果为空时，区分班级不存在、无权限和确实没有学生三种情况
+        if not students and class_id and current_user.role == UserRole.TEACHER:
+            error_response = await check_teacher_empty_class(current_user, class_id, class_exists=class_obj is not None)
+            if error_response:
+                return error_response
+        
         # 生成Excel文件
         title = "学生信息表"
-        if class_id:
-            class_obj = await Class.get_or_none(id=class_id).prefetch_related("grade")
-            if class_obj:
-                grade_name = class_obj.grade.name if hasattr(class_obj, "grade") and hasattr(class_obj.grade, "name") else ""
-                title = f"{grade_name}{class_obj.name}学生信息表"
+        if class_obj:
+            grade = getattr(class_obj, "grade", None)
+            grade_name = grade.name if grade is not None else ""
+            title = f"{grade_name}{class_obj.name}学生信息表"
+        
+        writer = ExcelRowWriter([col[1] for col in columns], title)
+        
+        # 按学号分批读取（键集分页），每批只投影导出需要的列并立即写入，不在内存中累积全部学生
+        while students:
+            # 班级列显示为"年级+班级"
+            writer.append_rows(
+                [
+                    student[key] if key != "class_name"
+                    else f"{student['grade_name'] or ''}{student['class_name'] or ''}"
+                    for key, _ in columns
+                ]
+                for student in students
+            )
+            
+            if len(students) < STUDENT_EXPORT_BATCH_SIZE:
+                break
+            students = await fetch_batch(students[-1]["student_code"])
         
-        output = ExcelUtils.write_excel(data, columns, title)
+        output = await asyncio.to_thread(writer.close)
         
         # 生成文件名
-        now = datetime.now().strftime("%Y%m%d%H%M%S")
+        now = get_request_timestamp().strftime("%Y%m%d%H%M%S")
         filename = f"学生信息表_{now}.xlsx"
         
         # 返回Excel文件
@@ -663,26 +640,38 @@ async def import_students(
                     f"Excel文件缺少必填列: {column}"
                 )
         
-        # 验证学号格式
-        def validate_student_code(code):
-            if not isinstance(code, str) or len(code) < 5 or len(code) > 20:
-                return "学号长度应在5-20个字符之间"
-            if not code.isalnum():
-                return "学号只能包含字母和数字"
-            return True
-        
-        # 验证数据
-        validators = {
-            "学号": validate_student_code
-        }
-        is_valid, errors = ExcelUtils.validate_data(df, required_columns, validators)
+        # 验证数据（必填列空值）
+        is_valid, errors = ExcelUtils.validate_data(df, required_columns)
+        
+        # 向量化验证学号格式：学号统一按字符串处理，空值已在上一步报告
+        code_present = df["学号"].notna()
+        codes = df["学号"].astype(str)
+        length_ok = codes.str.len().between(5, 20)
+        invalid_codes = code_present & ~(length_ok & codes.str.isalnum())
+        if invalid_codes.any():
+            is_valid = False
+            errors.extend(
+                {
+                    "type": "validation_error",
+                    "message": f"第{row_num}行的'学号'验证失败: {message}",
+                    "row": int(row_num),
+                    "column": "学号",
+                    "value": value
+                }
+                for row_num, value, message in zip(
+                    np.flatnonzero(invalid_codes.to_numpy()) + 2,  # Excel行号从1开始，标题行是第1行
+                    df.loc[invalid_codes, "学号"],
+                    np.where(length_ok[invalid_codes], "学号只能包含字母和数字", "学号长度应在5-20个字符之间")
+                )
+            )
+        df["学号"] = codes.where(code_present, None)
         
         if not is_valid:
             return StandardResponse(
                 code=status.HTTP_400_BAD_REQUEST,
                 message="导入数据验证失败",
                 data={"errors": errors},
-                timestamp=datetime.now()
+                timestamp=get_request_timestamp()
             )
         
         # 转换列名
@@ -703,53 +692,77 @@ async def import_students(
             if col not in df.columns:
                 df[col] = None
         
-        # 处理日期列
+        # 处理日期列：先按标准格式走快速解析路径，只有不符合该格式的少数值才回退到逐个推断格式
         if "birth_date" in df.columns:
-            df["birth_date"] = pd.to_datetime(df["birth_date"], errors="coerce").dt.date
-        
-        # 开始导入数据
-        success_count = 0
-        error_count = 0
-        error_details = []
-        
-        for idx, row in df.iterrows():
-            try:
-                # 检查学号是否已存在
-                existing_student = await Student.get_or_none(student_code=row["student_code"])
-                if existing_student:
+            birth_dates = pd.to_datetime(df["birth_date"], format="%Y-%m-%d", errors="coerce", cache=True)
+            unparsed = birth_dates.isna() & df["birth_date"].notna()
+            if unparsed.any():
+                birth_dates[unparsed] = pd.to_datetime(df.loc[unparsed, "birth_date"], errors="coerce", cache=True)
+            df["birth_date"] = birth_dates.dt.date
+        
+        # 按列提取为数组并一次性将缺失值转为None，逐行处理时不再构造Series或调用pd.notna
+        import_columns = ["student_code", "name", "gender", "birth_date", "phone", "parent_name", "parent_phone", "address"]
+        column_values = [
+            df[col].astype(object).where(df[col].notna(), None).to_numpy()
+            for col in import_columns
+        ]
+        
+        # 在同一事务中完成学号查重和批量写入：查重与插入共享同一快照，所有插入一次提交
+        async with in_transaction() as conn:
+            # 一次性查询文件中已存在的学号
+            existing_codes = set(await Student.filter(
+                student_code__in=df["student_code"].dropna().tolist()
+            ).using_db(conn).values_list("student_code", flat=True))
+            
+            # 开始导入数据：先整理待创建的学生，再批量写入
+            error_count = 0
+            error_details = []
+            students_to_create = []
+            
+            for idx, (student_code, name, gender, birth_date, phone, parent_name, parent_phone, address) in zip(
+                df.index, zip(*column_values)
+            ):
+                try:
+                    # 检查学号是否已存在（包括文件中重复的学号）
+                    if student_code in existing_codes:
+                        error_count += 1
+                        error_details.append({
+                            "row": idx + 2,
+                            "student_code": student_code,
+                            "name": name,
+                            "error": f"学号为{student_code}的学生已存在"
+                        })
+                        continue
+                    
+                    # 创建学生记录
+                    # 注意：这里没有处理用户账号关联，实际情况可能需要同时创建用户账号
+                    students_to_create.append(Student(
+                        student_code=student_code,
+                        name=name,
+                        gender=gender,
+                        birth_date=birth_date,
+                        phone=phone,
+                        parent_name=parent_name,
+                        parent_phone=parent_phone,
+                        address=address,
+                        class_field_id=class_id,
+                        # 需要处理用户关联
+                        user_id=None  # 这里需要根据实际情况处理
+                    ))
+                    existing_codes.add(student_code)
+                except Exception as e:
                     error_count += 1
                     error_details.append({
                         "row": idx + 2,
-                        "student_code": row["student_code"],
-                        "name": row["name"],
-                        "error": f"学号为{row['student_code']}的学生已存在"
+                        "student_code": student_code or "",
+                        "name": name or "",
+                        "error": str(e)
                     })
-                    continue
-                
-                # 创建学生记录
-                # 注意：这里没有处理用户账号关联，实际情况可能需要同时创建用户账号
-                await Student.create(
-                    student_code=row["student_code"],
-                    name=row["name"],
-                    gender=row["gender"] if pd.notna(row["gender"]) else None,
-                    birth_date=row["birth_date"] if pd.notna(row["birth_date"]) else None,
-                    phone=row["phone"] if pd.notna(row["phone"]) else None,
-                    parent_name=row["parent_name"] if pd.notna(row["parent_name"]) else None,
-                    parent_phone=row["parent_phone"] if pd.notna(row["parent_phone"]) else None,
-                    address=row["address"] if pd.notna(row["address"]) else None,
-                    class_field_id=class_id,
-                    # 需要处理用户关联
-                    user_id=None  # 这里需要根据实际情况处理
-                )
-                success_count += 1
-            except Exception as e:
-                error_count += 1
-                error_details.append({
-                    "row": idx + 2,
-                    "student_code": row["student_code"] if "student_code" in row and pd.notna(row["student_code"]) else "",
-                    "name": row["name"] if "name" in row and pd.notna(row["name"]) else "",
-                    "error": str(e)
-                })
+            
+            # 批量创建学生
+            if students_to_create:
+                await Student.bulk_create(students_to_create, batch_size=500, using_db=conn)
+        success_count = len(students_to_create)
         
         # 返回结果
         return StandardResponse(
@@ -760,7 +773,7 @@ async def import_students(
                 "error_count": error_count,
                 "error_details": error_details
             },
-            timestamp=datetime.now()
+            timestamp=get_request_timestamp()
         )
     except HTTPException as e:
         return create_error_response(
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import ORJSONResponse
+from tortoise.expressions import Q
+from typing import List, Optional, Dict, Any, Tuple, Hashable, Callable, Awaitable
+import asyncio
+import hashlib
+import time
+import orjson
 
 from app.api.dependencies.auth import get_current_user, get_current_active_user
 from app.api.dependencies.permissions import check_is_admin
@@ -10,25 +15,70 @@ from app.models.subject import Subject
 from app.models.teacher import Teacher
 from app.models.score import Score
 from app.schemas.common import StandardResponse, PaginatedResponse
+from app.schemas.subject import SubjectCreate, SubjectUpdate
+from app.api.responses import ok, create_error_response
 
-router = APIRouter()
+# 使用orjson序列化响应，比标准库json更快
+router = APIRouter(default_response_class=ORJSONResponse)
 
-# 错误处理函数
-def create_error_response(status_code: int, detail: str) -> StandardResponse:
-    """创建标准错误响应"""
-    return StandardResponse(
-        code=status_code,
-        message=detail,
-        data=None,
-        timestamp=datetime.now()
-    )
+# 学科列表接口返回的字段（配合values()投影，跳过模型实例化）
+SUBJECT_LIST_FIELDS = ("id", "name", "code", "description", "created_at", "updated_at")
+
+def subject_to_dict(subject: Subject) -> Dict[str, Any]:
+    """将学科对象转换为响应数据（与列表、详情接口返回的字段一致）"""
+    return {field: getattr(subject, field) for field in SUBJECT_LIST_FIELDS}
+
+# 学科信息进程内缓存：学科很少变动，教师写操作校验学科时优先读取缓存
+SUBJECT_CACHE_TTL = 300  # 秒
+subject_cache: Dict[int, Tuple[float, Optional[Dict[str, Any]]]] = {}
+
+# 学科查询接口的响应缓存：缓存键 -> (过期时间, 响应数据, ETag)
+SUBJECT_READ_CACHE_TTL = 60  # 秒
+subject_read_cache: Dict[Hashable, Tuple[float, Any, str]] = {}
+
+# 学科写操作时递增，用于丢弃写操作前发起、写操作后才返回的查询结果
+subject_cache_version = 0
+
+async def get_cached_subject(subject_id: int) -> Optional[Dict[str, Any]]:
+    """获取学科的id和名称，学科不存在时返回None，结果缓存SUBJECT_CACHE_TTL秒"""
+    now = time.monotonic()
+    cached = subject_cache.get(subject_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    version = subject_cache_version
+    subject = await Subject.filter(id=subject_id).first().values("id", "name")
+    if version == subject_cache_version:
+        subject_cache[subject_id] = (now + SUBJECT_CACHE_TTL, subject)
+    return subject
+
+async def get_cached_subject_read(
+    cache_key: Hashable,
+    loader: Callable[[], Awaitable[Any]]
+) -> Tuple[Any, str]:
+    """从缓存获取学科查询接口的响应数据及其ETag，未命中时调用loader查询（结果为None时不缓存）"""
+    now = time.monotonic()
+    cached = subject_read_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1], cached[2]
+    
+    version = subject_cache_version
+    data = await loader()
+    etag = f'W/"{hashlib.blake2b(orjson.dumps(data), digest_size=8).hexdigest()}"'
+    if data is not None and version == subject_cache_version:
+        subject_read_cache[cache_key] = (now + SUBJECT_READ_CACHE_TTL, data, etag)
+    return data, etag
+
+def invalidate_subject_cache() -> None:
+    """学科创建、更新或删除后清空学科缓存"""
+    global subject_cache_version
+    subject_cache_version += 1
+    subject_cache.clear()
+    subject_read_cache.clear()
 
 @router.post("/", response_model=StandardResponse, summary="创建学科")
 async def create_subject(
-    name: str,
-    code: str,
-    credit: float = 0,
-    description: Optional[str] = None,
+    subject_in: SubjectCreate,
     current_user: User = Depends(check_is_admin)
 ):
     """
@@ -45,27 +95,23 @@ async def create_subject(
     """
     try:
         # 检查学科代码是否已存在
-        existing_subject = await Subject.get_or_none(code=code)
+        existing_subject = await Subject.get_or_none(code=subject_in.code)
         if existing_subject:
             return create_error_response(
                 status.HTTP_409_CONFLICT, 
-                f"学科代码'{code}'已存在"
+                f"学科代码'{subject_in.code}'已存在"
             )
         
         # 创建学科
         subject = await Subject.create(
-            name=name,
-            code=code,
-            credit=credit,
-            description=description
+            name=subject_in.name,
+            code=subject_in.code,
+            credit=subject_in.credit,
+            description=subject_in.description
         )
+        invalidate_subject_cache()
         
-        return StandardResponse(
-            code=status.HTTP_201_CREATED,
-            message="学科创建成功",
-            data=subject,
-            timestamp=datetime.now()
-        )
+        return ok(subject_to_dict(subject), "学科创建成功", status.HTTP_201_CREATED)
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -74,6 +120,7 @@ async def create_subject(
 
 @router.get("/", response_model=StandardResponse, summary="获取学科列表")
 async def get_subjects(
+    request: Request,
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
@@ -93,40 +140,45 @@ async def get_subjects(
     - 管理员：可查看所有学科
     """
     try:
-        # 构建查询
-        query = Subject.all()
-        
-        if search:
-            query = query.filter(name__icontains=search) | query.filter(code__icontains=search)
-        
-        # 根据用户角色筛选
-        if current_user.role == UserRole.TEACHER or current_user.role == UserRole.HEADTEACHER:
-            # 教师只能看到自己任教的学科
-            teacher = await Teacher.get_or_none(user_id=current_user.id)
-            if teacher and teacher.subject_id:
-                query = query.filter(id=teacher.subject_id)
-        
-        # 计算总数
-        total = await query.count()
-        
-        # 分页查询
-        subjects = await query.offset((page - 1) * page_size).limit(page_size)
+        async def load_subjects() -> Dict[str, Any]:
+            # 构建查询
+            query = Subject.all()
+            
+            # 学科数量很少，模糊匹配的全表扫描代价可以忽略，不额外建立索引
+            if search:
+                query = query.filter(Q(name__icontains=search) | Q(code__icontains=search))
+            
+            # 根据用户角色筛选
+            if current_user.role == UserRole.TEACHER or current_user.role == UserRole.HEADTEACHER:
+                # 教师只能看到自己任教的学科
+                teacher = await Teacher.get_or_none(user_id=current_user.id)
+                if teacher and teacher.subject_id:
+                    query = query.filter(id=teacher.subject_id)
+            
+            # 并发计算总数和分页查询
+            total, subjects = await asyncio.gather(
+                query.count(),
+                query.offset((page - 1) * page_size).limit(page_size).values(*SUBJECT_LIST_FIELDS)
+            )
+            
+            # 创建响应数据
+            return {
+                "items": subjects,
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "total_pages": (total + page_size - 1) // page_size
+            }
         
-        # 创建响应数据
-        response_data = {
-            "items": subjects,
-            "total": total,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
-        }
+        # 教师/班主任的结果按本人任教学科筛选，因此缓存键区分用户
+        is_teacher = current_user.role == UserRole.TEACHER or current_user.role == UserRole.HEADTEACHER
+        cache_key = ("list", search, page, page_size, current_user.id if is_teacher else None)
+        response_data, etag = await get_cached_subject_read(cache_key, load_subjects)
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="获取学科列表成功",
-            data=response_data,
-            timestamp=datetime.now()
-        )
+        # 客户端缓存的数据未变化时返回304
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return ok(response_data, "获取学科列表成功", headers={"ETag": etag})
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -136,6 +188,7 @@ async def get_subjects(
 @router.get("/{subject_id}", response_model=StandardResponse, summary="获取学科详情")
 async def get_subject(
     subject_id: int,
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """
@@ -150,19 +203,20 @@ async def get_subject(
     - 管理员：可查看任何学科详情
     """
     try:
-        subject = await Subject.get_or_none(id=subject_id)
+        subject, etag = await get_cached_subject_read(
+            ("detail", subject_id),
+            lambda: Subject.filter(id=subject_id).first().values(*SUBJECT_LIST_FIELDS)
+        )
         if not subject:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{subject_id}的学科"
             )
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="获取学科详情成功",
-            data=subject,
-            timestamp=datetime.now()
-        )
+        # 客户端缓存的数据未变化时返回304
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return ok(subject, "获取学科详情成功", headers={"ETag": etag})
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -172,10 +226,7 @@ async def get_subject(
 @router.put("/{subject_id}", response_model=StandardResponse, summary="更新学科信息")
 async def update_subject(
     subject_id: int,
-    name: Optional[str] = None,
-    code: Optional[str] = None,
-    credit: Optional[float] = None,
-    description: Optional[str] = None,
+    subject_in: SubjectUpdate,
     current_user: User = Depends(check_is_admin)
 ):
     """
@@ -200,32 +251,34 @@ async def update_subject(
             )
         
         # 检查学科代码是否重复
-        if code and code != subject.code:
-            existing_subject = await Subject.get_or_none(code=code)
+        if subject_in.code and subject_in.code != subject.code:
+            existing_subject = await Subject.get_or_none(code=subject_in.code)
             if existing_subject:
                 return create_error_response(
                     status.HTTP_409_CONFLICT, 
-                    f"学科代码'{code}'已存在"
+                    f"学科代码'{subject_in.code}'已存在"
                 )
         
-        # 更新字段
-        if name:
-            subject.name = name
-        if code:
-            subject.code = code
-        if credit is not None:
-            subject.credit = credit
-        if description is not None:  # 允许设置为空字符串
-            subject.description = description
+        # 更新字段，记录实际修改的字段，保存时只更新这些列
+        update_fields = []
+        if subject_in.name:
+            subject.name = subject_in.name
+            update_fields.append("name")
+        if subject_in.code:
+            subject.code = subject_in.code
+            update_fields.append("code")
+        if subject_in.credit is not None:
+            # 学科模型没有对应的列，仅保留在返回对象上
+            subject.credit = subject_in.credit
+        if subject_in.description is not None:  # 允许设置为空字符串
+            subject.description = subject_in.description
+            update_fields.append("description")
         
-        await subject.save()
+        if update_fields:
+            await subject.save(update_fields=[*update_fields, "updated_at"])
+            invalidate_subject_cache()
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="学科信息更新成功",
-            data=subject,
-            timestamp=datetime.now()
-        )
+        return ok(subject_to_dict(subject), "学科信息更新成功")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -247,7 +300,12 @@ async def delete_subject(
     - 班主任/教师/学生：无权删除学科
     """
     try:
-        subject = await Subject.get_or_none(id=subject_id)
+        # 并发获取学科并检查是否有关联的教师和成绩（EXISTS命中第一条即返回，仅在需要提示时再统计条数）
+        subject, has_teachers, has_scores = await asyncio.gather(
+            Subject.get_or_none(id=subject_id),
+            Teacher.exists(subject_id=subject_id),
+            Score.exists(subject_id=subject_id)
+        )
         if not subject:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -255,16 +313,16 @@ async def delete_subject(
             )
         
         # 检查是否有教师关联到这个学科
-        teacher_count = await Teacher.filter(subject_id=subject_id).count()
-        if teacher_count > 0:
+        if has_teachers:
+            teacher_count = await Teacher.filter(subject_id=subject_id).count()
             return create_error_response(
                 status.HTTP_400_BAD_REQUEST, 
                 f"无法删除学科，该学科下有{teacher_count}名教师"
             )
         
         # 检查是否有成绩关联到这个学科
-        score_count = await Score.filter(subject_id=subject_id).count()
-        if score_count > 0:
+        if has_scores:
+            score_count = await Score.filter(subject_id=subject_id).count()
             return create_error_response(
                 status.HTTP_400_BAD_REQUEST, 
                 f"无法删除学科，该学科下有{score_count}条成绩记录"
@@ -272,13 +330,9 @@ async def delete_subject(
         
         # 删除学科
         await subject.delete()
+        invalidate_subject_cache()
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="学科删除成功",
-            data=None,
-            timestamp=datetime.now()
-        )
+        return ok(message="学科删除成功")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
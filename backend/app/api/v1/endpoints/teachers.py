@@ -1,36 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import List, Optional
-from datetime import datetime
+from fastapi.responses import ORJSONResponse
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
+from typing import List, Optional, Dict, Any
+from collections import defaultdict
+import asyncio
 
 from app.api.dependencies.auth import get_current_user, get_current_active_user
-from app.api.dependencies.permissions import check_is_admin, check_is_teacher_or_admin
+from app.api.dependencies.permissions import (
+    check_is_admin, check_is_teacher_or_admin, invalidate_teacher_class_access_cache
+)
 from app.models.enums import UserRole
 from app.models.user import User
 from app.models.teacher import Teacher
 from app.models.subject import Subject
 from app.models.class_model import Class
+from app.api.v1.endpoints.subjects import get_cached_subject, invalidate_subject_cache
+from app.crud.crud_user import invalidate_user_profile_cache
 from app.schemas.common import StandardResponse, PaginatedResponse
+from app.schemas.teacher import TeacherCreate, TeacherUpdate, TeacherClassAssignment
+from app.api.responses import ok, create_error_response
 
-router = APIRouter()
-
-# 错误处理函数
-def create_error_response(status_code: int, detail: str) -> StandardResponse:
-    """创建标准错误响应"""
-    return StandardResponse(
-        code=status_code,
-        message=detail,
-        data=None,
-        timestamp=datetime.now()
-    )
+# 使用orjson序列化响应，比标准库json更快
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/", response_model=StandardResponse, summary="创建教师信息")
 async def create_teacher(
-    name: str,
-    teacher_code: str,
-    subject_id: int,
-    user_id: int,
-    phone: Optional[str] = None,
-    email: Optional[str] = None,
+    teacher_in: TeacherCreate,
     current_user: User = Depends(check_is_admin)
 ):
     """
@@ -48,33 +44,37 @@ async def create_teacher(
     - 班主任/教师/学生：无权创建教师信息
     """
     try:
+        # 并发执行相互独立的检查；只有学科对象在返回数据中用到，其余只需判断是否存在
+        user_exists, subject, code_exists, user_linked = await asyncio.gather(
+            User.exists(id=teacher_in.user_id),
+            get_cached_subject(teacher_in.subject_id),
+            Teacher.exists(teacher_code=teacher_in.teacher_code),
+            Teacher.exists(user_id=teacher_in.user_id)
+        )
+        
         # 检查用户是否存在
-        user = await User.get_or_none(id=user_id)
-        if not user:
+        if not user_exists:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
-                f"未找到ID为{user_id}的用户"
+                f"未找到ID为{teacher_in.user_id}的用户"
             )
         
         # 检查学科是否存在
-        subject = await Subject.get_or_none(id=subject_id)
         if not subject:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
-                f"未找到ID为{subject_id}的学科"
+                f"未找到ID为{teacher_in.subject_id}的学科"
             )
         
         # 检查教师编号是否已存在
-        existing_teacher = await Teacher.get_or_none(teacher_code=teacher_code)
-        if existing_teacher:
+        if code_exists:
             return create_error_response(
                 status.HTTP_409_CONFLICT, 
-                f"教师编号为{teacher_code}的教师已存在"
+                f"教师编号为{teacher_in.teacher_code}的教师已存在"
             )
         
         # 检查用户是否已关联教师
-        existing_teacher_user = await Teacher.get_or_none(user_id=user_id)
-        if existing_teacher_user:
+        if user_linked:
             return create_error_response(
                 status.HTTP_409_CONFLICT, 
                 f"该用户已关联其他教师"
@@ -82,18 +82,17 @@ async def create_teacher(
         
         # 创建教师
         teacher = await Teacher.create(
-            name=name,
-            teacher_code=teacher_code,
-            subject_id=subject_id,
-            user_id=user_id,
-            phone=phone,
-            email=email
+            name=teacher_in.name,
+            teacher_code=teacher_in.teacher_code,
+            subject_id=teacher_in.subject_id,
+            user_id=teacher_in.user_id,
+            phone=teacher_in.phone,
+            email=teacher_in.email
         )
+        invalidate_subject_cache()
+        await invalidate_user_profile_cache(teacher.user_id)
         
-        # 预加载关联数据以便返回
-        await teacher.fetch_related("subject")
-        
-        # 转换为响应数据
+        # 转换为响应数据（学科已在检查时取得，无需再次加载）
         teacher_data = {
             "id": teacher.id,
             "name": teacher.name,
@@ -101,18 +100,13 @@ async def create_teacher(
             "phone": teacher.phone,
             "email": teacher.email,
             "subject": {
-                "id": teacher.subject.id,
-                "name": teacher.subject.name
+                "id": subject["id"],
+                "name": subject["name"]
             },
             "user_id": teacher.user_id
         }
         
-        return StandardResponse(
-            code=status.HTTP_201_CREATED,
-            message="教师创建成功",
-            data=teacher_data,
-            timestamp=datetime.now()
-        )
+        return ok(data=teacher_data, message="教师创建成功", code=status.HTTP_201_CREATED)
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -142,51 +136,61 @@ async def get_teachers(
     """
     try:
         # 构建查询
-        query = Teacher.all().prefetch_related("subject")
+        query = Teacher.all()
         
         # 根据学科筛选
         if subject_id:
             query = query.filter(subject_id=subject_id)
             
-        # 根据关键词搜索
+        # 根据关键词搜索（MySQL下前后模糊匹配无法使用B-tree索引；教师表规模较小，全表扫描的代价可以接受，
+        # 如数据量增长需要索引加速，可考虑ngram全文索引）
         if search:
             query = query.filter(
-                name__icontains=search
-            ) | query.filter(
-                teacher_code__icontains=search
-            ) | query.filter(
-                email__icontains=search
+                Q(name__icontains=search) | Q(teacher_code__icontains=search) | Q(email__icontains=search)
             )
         
-        # 计算总数
-        total = await query.count()
+        # 并发计算总数和分页查询，只投影需要的列，学科信息通过JOIN直接取出
+        total, teachers = await asyncio.gather(
+            query.count(),
+            query.order_by("name").offset((page - 1) * page_size).limit(page_size).values(
+                "id", "name", "teacher_code", "phone", "email",
+                subject_id="subject__id",
+                subject_name="subject__name"
+            )
+        )
         
-        # 分页查询
-        teachers = await query.order_by("name").offset((page - 1) * page_size).limit(page_size)
+        # 按本页教师ID批量查询担任班主任的班级和任教的班级，避免逐个教师查询
+        teacher_ids = [teacher["id"] for teacher in teachers]
+        headteacher_rows, teaching_rows = await asyncio.gather(
+            Class.filter(headteacher_id__in=teacher_ids).values("id", "name", "headteacher_id"),
+            Class.filter(teachers__id__in=teacher_ids).values("id", "name", teacher_id="teachers__id")
+        )
+        
+        headteacher_classes_map = defaultdict(list)
+        for row in headteacher_rows:
+            headteacher_classes_map[row["headteacher_id"]].append({"id": row["id"], "name": row["name"]})
+        
+        teaching_classes_map = defaultdict(list)
+        for row in teaching_rows:
+            teaching_classes_map[row["teacher_id"]].append({"id": row["id"], "name": row["name"]})
         
         # 转换为响应数据
-        teacher_list = []
-        for teacher in teachers:
-            # 获取该教师是否为班主任的班级
-            headteacher_classes = await Class.filter(headteacher_id=teacher.id).values("id", "name")
-            
-            # 获取该教师任教的班级
-            teaching_classes = await teacher.teaching_classes.all().values("id", "name")
-            
-            teacher_data = {
-                "id": teacher.id,
-                "name": teacher.name,
-                "teacher_code": teacher.teacher_code,
-                "phone": teacher.phone,
-                "email": teacher.email,
+        teacher_list = [
+            {
+                "id": teacher["id"],
+                "name": teacher["name"],
+                "teacher_code": teacher["teacher_code"],
+                "phone": teacher["phone"],
+                "email": teacher["email"],
                 "subject": {
-                    "id": teacher.subject.id,
-                    "name": teacher.subject.name
+                    "id": teacher["subject_id"],
+                    "name": teacher["subject_name"]
                 },
-                "headteacher_classes": headteacher_classes,
-                "teaching_classes": teaching_classes
+                "headteacher_classes": headteacher_classes_map[teacher["id"]],
+                "teaching_classes": teaching_classes_map[teacher["id"]]
             }
-            teacher_list.append(teacher_data)
+            for teacher in teachers
+        ]
         
         # 创建分页响应
         paginated_response = {
@@ -197,12 +201,7 @@ async def get_teachers(
             "total_pages": (total + page_size - 1) // page_size
         }
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="获取教师列表成功",
-            data=paginated_response,
-            timestamp=datetime.now()
-        )
+        return ok(data=paginated_response, message="获取教师列表成功")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -226,39 +225,26 @@ async def get_teacher(
     - 管理员：可查看任何教师的详细信息
     """
     try:
-        # 获取教师信息
-        teacher = await Teacher.get_or_none(id=teacher_id).prefetch_related("subject", "user")
+        # 并发获取教师信息、担任班主任的班级和任教的班级；班级及年级名称通过JOIN直接投影为字典
+        teacher, headteacher_classes, teaching_classes = await asyncio.gather(
+            Teacher.get_or_none(id=teacher_id).select_related("subject", "user"),
+            Class.filter(headteacher_id=teacher_id).values("id", "name", grade_name="grade__name"),
+            Class.filter(teachers__id=teacher_id).values("id", "name", grade_name="grade__name")
+        )
         if not teacher:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{teacher_id}的教师"
             )
         
-        # 获取该教师是否为班主任的班级
-        headteacher_classes = await Class.filter(headteacher_id=teacher.id).prefetch_related("grade")
-        
-        headteacher_classes_data = []
-        for cls in headteacher_classes:
-            grade_name = cls.grade.name if hasattr(cls, "grade") else ""
-            headteacher_classes_data.append({
-                "id": cls.id,
-                "name": cls.name,
-                "grade_name": grade_name,
-                "full_name": f"{grade_name}{cls.name}" if grade_name else cls.name
-            })
-        
-        # 获取该教师任教的班级
-        teaching_classes = await teacher.teaching_classes.all().prefetch_related("grade")
-        
-        teaching_classes_data = []
-        for cls in teaching_classes:
-            grade_name = cls.grade.name if hasattr(cls, "grade") else ""
-            teaching_classes_data.append({
-                "id": cls.id,
-                "name": cls.name,
-                "grade_name": grade_name,
-                "full_name": f"{grade_name}{cls.name}" if grade_name else cls.name
-            })
+        headteacher_classes_data = [
+            {**cls, "full_name": f"{cls['grade_name']}{cls['name']}" if cls["grade_name"] else cls["name"]}
+            for cls in headteacher_classes
+        ]
+        teaching_classes_data = [
+            {**cls, "full_name": f"{cls['grade_name']}{cls['name']}" if cls["grade_name"] else cls["name"]}
+            for cls in teaching_classes
+        ]
         
         # 转换为响应数据
         teacher_data = {
@@ -277,12 +263,7 @@ async def get_teacher(
             "teaching_classes": teaching_classes_data
         }
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="获取教师详情成功",
-            data=teacher_data,
-            timestamp=datetime.now()
-        )
+        return ok(data=teacher_data, message="获取教师详情成功")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -292,11 +273,7 @@ async def get_teacher(
 @router.put("/{teacher_id}", response_model=StandardResponse, summary="更新教师信息")
 async def update_teacher(
     teacher_id: int,
-    name: Optional[str] = None,
-    teacher_code: Optional[str] = None,
-    subject_id: Optional[int] = None,
-    phone: Optional[str] = None,
-    email: Optional[str] = None,
+    teacher_in: TeacherUpdate,
     current_user: User = Depends(check_is_admin)
 ):
     """
@@ -314,43 +291,71 @@ async def update_teacher(
     - 班主任/教师/学生：无权更新教师信息
     """
     try:
-        # 获取教师信息
-        teacher = await Teacher.get_or_none(id=teacher_id)
+        async def check_code_conflict() -> bool:
+            if not teacher_in.teacher_code:
+                return False
+            return await Teacher.filter(teacher_code=teacher_in.teacher_code).exclude(id=teacher_id).exists()
+        
+        async def get_subject() -> Optional[Dict[str, Any]]:
+            if not teacher_in.subject_id:
+                return None
+            return await get_cached_subject(teacher_in.subject_id)
+        
+        # 并发获取教师信息、检查教师编号冲突和学科
+        teacher, code_conflict, subject = await asyncio.gather(
+            Teacher.get_or_none(id=teacher_id),
+            check_code_conflict(),
+            get_subject()
+        )
         if not teacher:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{teacher_id}的教师"
             )
         
+        # 记录实际修改的字段，保存时只更新这些列
+        update_fields = []
+        
         # 检查教师编号是否已存在（如果修改了编号）
-        if teacher_code and teacher_code != teacher.teacher_code:
-            existing_teacher = await Teacher.get_or_none(teacher_code=teacher_code)
-            if existing_teacher and existing_teacher.id != teacher_id:
+        if teacher_in.teacher_code and teacher_in.teacher_code != teacher.teacher_code:
+            if code_conflict:
                 return create_error_response(
                     status.HTTP_409_CONFLICT, 
-                    f"教师编号为{teacher_code}的教师已存在"
+                    f"教师编号为{teacher_in.teacher_code}的教师已存在"
                 )
-            teacher.teacher_code = teacher_code
+            teacher.teacher_code = teacher_in.teacher_code
+            update_fields.append("teacher_code")
         
         # 检查学科是否存在（如果修改了学科）
-        if subject_id and subject_id != teacher.subject_id:
-            subject = await Subject.get_or_none(id=subject_id)
+        subject_changed = False
+        if teacher_in.subject_id and teacher_in.subject_id != teacher.subject_id:
             if not subject:
                 return create_error_response(
                     status.HTTP_404_NOT_FOUND, 
-                    f"未找到ID为{subject_id}的学科"
+                    f"未找到ID为{teacher_in.subject_id}的学科"
                 )
-            teacher.subject_id = subject_id
+            teacher.subject_id = teacher_in.subject_id
+            update_fields.append("subject_id")
+            subject_changed = True
         
         # 更新教师信息
-        if name:
-            teacher.name = name
-        if phone is not None:  # 允许设置为空字符串
-            teacher.phone = phone
-        if email is not None:  # 允许设置为空字符串
-            teacher.email = email
-        
-        await teacher.save()
+        if teacher_in.name:
+            teacher.name = teacher_in.name
+            update_fields.append("name")
+        if teacher_in.phone is not None:  # 允许设置为空字符串
+            teacher.phone = teacher_in.phone
+            update_fields.append("phone")
+        if teacher_in.email is not None:  # 允许设置为空字符串
+            teacher.email = teacher_in.email
+            update_fields.append("email")
+        
+        if update_fields:
+            await teacher.save(update_fields=[*update_fields, "updated_at"])
+            await invalidate_user_profile_cache(teacher.user_id)
+        
+        # 教师可见的学科列表随任教学科变化
+        if subject_changed:
+            invalidate_subject_cache()
         
         # 预加载关联数据以便返回
         await teacher.fetch_related("subject")
@@ -369,12 +374,7 @@ async def update_teacher(
             "user_id": teacher.user_id
         }
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="教师信息更新成功",
-            data=teacher_data,
-            timestamp=datetime.now()
-        )
+        return ok(data=teacher_data, message="教师信息更新成功")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -396,39 +396,38 @@ async def delete_teacher(
     - 班主任/教师/学生：无权删除教师
     """
     try:
-        teacher = await Teacher.get_or_none(id=teacher_id)
-        if not teacher:
+        # 班主任检查与删除放在同一事务中完成：
+        # 任教班级关联表的外键为 ON DELETE CASCADE，删除教师时由数据库一并清理关联行，
+        # 无需先 clear() 再删除，删除本身只需一条 DELETE 语句
+        async with in_transaction() as conn:
+            headteacher_classes = await Class.filter(
+                headteacher_id=teacher_id
+            ).using_db(conn).count()
+            if headteacher_classes > 0:
+                return create_error_response(
+                    status.HTTP_400_BAD_REQUEST, 
+                    f"无法删除教师，该教师是{headteacher_classes}个班级的班主任"
+                )
+            
+            # 删除前取得关联用户和任教班级，用于清除个人资料和班级访问权限缓存
+            teacher_user_id = await Teacher.filter(
+                id=teacher_id
+            ).using_db(conn).first().values_list("user_id", flat=True)
+            teaching_class_ids = await Class.filter(
+                teachers__id=teacher_id
+            ).using_db(conn).values_list("id", flat=True)
+            deleted_count = await Teacher.filter(id=teacher_id).using_db(conn).delete()
+        
+        if not deleted_count:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{teacher_id}的教师"
             )
+        await invalidate_teacher_class_access_cache(*teaching_class_ids)
+        await invalidate_user_profile_cache(teacher_user_id)
+        invalidate_subject_cache()
         
-        # 检查是否有班级以该教师为班主任
-        headteacher_classes = await Class.filter(headteacher_id=teacher_id).count()
-        if headteacher_classes > 0:
-            return create_error_response(
-                status.HTTP_400_BAD_REQUEST, 
-                f"无法删除教师，该教师是{headteacher_classes}个班级的班主任"
-            )
-        
-        # 获取该教师的用户ID，以便后续可能的用户删除
-        user_id = teacher.user_id
-        
-        # 删除该教师与任教班级的关联关系
-        await teacher.teaching_classes.clear()
-        
-        # 删除教师
-        await teacher.delete()
-        
-        # 可选：同时删除关联的用户账号
-        # await User.filter(id=user_id).delete()
-        
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="教师删除成功",
-            data=None,
-            timestamp=datetime.now()
-        )
+        return ok(message="教师删除成功")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -452,16 +451,18 @@ async def assign_teacher_to_class(
     - 班主任/教师/学生：无权分配教师到班级
     """
     try:
-        # 获取教师信息
-        teacher = await Teacher.get_or_none(id=teacher_id)
+        # 并发获取教师、班级信息并检查任课关系
+        teacher, class_obj, existing_relationship = await asyncio.gather(
+            Teacher.get_or_none(id=teacher_id),
+            Class.get_or_none(id=class_id),
+            Class.exists(id=class_id, teachers__id=teacher_id)
+        )
         if not teacher:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{teacher_id}的教师"
             )
         
-        # 获取班级信息
-        class_obj = await Class.get_or_none(id=class_id)
         if not class_obj:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -469,7 +470,6 @@ async def assign_teacher_to_class(
             )
         
         # 检查教师是否已经是该班级的任课教师
-        existing_relationship = await teacher.teaching_classes.filter(id=class_id).exists()
         if existing_relationship:
             return create_error_response(
                 status.HTTP_409_CONFLICT, 
@@ -478,13 +478,9 @@ async def assign_teacher_to_class(
         
         # 添加教师为班级的任课教师
         await teacher.teaching_classes.add(class_obj)
+        await invalidate_teacher_class_access_cache(class_id)
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="教师成功分配到班级",
-            data=None,
-            timestamp=datetime.now()
-        )
+        return ok(message="教师成功分配到班级")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -508,16 +504,18 @@ async def remove_teacher_from_class(
     - 班主任/教师/学生：无权从班级移除教师
     """
     try:
-        # 获取教师信息
-        teacher = await Teacher.get_or_none(id=teacher_id)
+        # 并发获取教师、班级信息并检查任课关系
+        teacher, class_obj, existing_relationship = await asyncio.gather(
+            Teacher.get_or_none(id=teacher_id),
+            Class.get_or_none(id=class_id),
+            Class.exists(id=class_id, teachers__id=teacher_id)
+        )
         if not teacher:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{teacher_id}的教师"
             )
         
-        # 获取班级信息
-        class_obj = await Class.get_or_none(id=class_id)
         if not class_obj:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -525,7 +523,6 @@ async def remove_teacher_from_class(
             )
         
         # 检查教师是否是该班级的任课教师
-        existing_relationship = await teacher.teaching_classes.filter(id=class_id).exists()
         if not existing_relationship:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -541,13 +538,9 @@ async def remove_teacher_from_class(
         
         # 移除教师与班级的关联
         await teacher.teaching_classes.remove(class_obj)
+        await invalidate_teacher_class_access_cache(class_id)
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="教师已从班级移除",
-            data=None,
-            timestamp=datetime.now()
-        )
+        return ok(message="教师已从班级移除")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -571,16 +564,18 @@ async def set_headteacher(
     - 班主任/教师/学生：无权设置班主任
     """
     try:
-        # 获取教师信息
-        teacher = await Teacher.get_or_none(id=teacher_id)
+        # 并发获取教师、班级信息并检查任课关系
+        teacher, class_obj, existing_relationship = await asyncio.gather(
+            Teacher.get_or_none(id=teacher_id),
+            Class.get_or_none(id=class_id),
+            Class.exists(id=class_id, teachers__id=teacher_id)
+        )
         if not teacher:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
                 f"未找到ID为{teacher_id}的教师"
             )
         
-        # 获取班级信息
-        class_obj = await Class.get_or_none(id=class_id)
         if not class_obj:
             return create_error_response(
                 status.HTTP_404_NOT_FOUND, 
@@ -595,21 +590,17 @@ async def set_headteacher(
                 f"该班级已有班主任：{old_headteacher.name}"
             )
         
-        # 设置为班主任
-        class_obj.headteacher_id = teacher_id
-        await class_obj.save()
-        
-        # 同时确保教师是班级的任课教师
-        existing_relationship = await teacher.teaching_classes.filter(id=class_id).exists()
-        if not existing_relationship:
-            await teacher.teaching_classes.add(class_obj)
+        # 设置为班主任，同时确保教师是班级的任课教师（同一事务内提交）
+        async with in_transaction() as conn:
+            class_obj.headteacher_id = teacher_id
+            await class_obj.save(using_db=conn, update_fields=["headteacher_id", "updated_at"])
+            
+            if not existing_relationship:
+                await teacher.teaching_classes.add(class_obj, using_db=conn)
+        await invalidate_teacher_class_access_cache(class_id)
+        await invalidate_user_profile_cache(teacher.user_id)
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="教师成功设置为班主任",
-            data=None,
-            timestamp=datetime.now()
-        )
+        return ok(message="教师成功设置为班主任")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
@@ -658,16 +649,91 @@ async def remove_headteacher(
         
         # 取消班主任身份
         class_obj.headteacher_id = None
-        await class_obj.save()
+        await class_obj.save(update_fields=["headteacher_id", "updated_at"])
+        await invalidate_teacher_class_access_cache(class_id)
+        await invalidate_user_profile_cache(teacher.user_id)
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="已取消班主任身份",
-            data=None,
-            timestamp=datetime.now()
-        )
+        return ok(message="已取消班主任身份")
     except Exception as e:
         return create_error_response(
             status.HTTP_500_INTERNAL_SERVER_ERROR, 
             f"取消班主任身份失败: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+
+@router.post("/assignments/batch", response_model=StandardResponse, summary="批量将教师分配到班级")
+async def batch_assign_teachers_to_classes(
+    assignments: List[TeacherClassAssignment],
+    current_user: User = Depends(check_is_admin)
+):
+    """
+    批量将教师分配到班级（添加为任课教师）
+    
+    - **assignments**: 教师ID与班级ID的列表，已存在的任课关系会被跳过
+    
+    权限要求：
+    - 管理员：可将任何教师分配到任何班级
+    - 班主任/教师/学生：无权分配教师到班级
+    """
+    try:
+        # 去重并保持提交顺序
+        pairs = list(dict.fromkeys((item.teacher_id, item.class_id) for item in assignments))
+        if not pairs:
+            return create_error_response(
+                status.HTTP_400_BAD_REQUEST, 
+                "分配列表不能为空"
+            )
+        
+        teacher_ids = {teacher_id for teacher_id, _ in pairs}
+        class_ids = {class_id for _, class_id in pairs}
+        
+        # 每类校验各一条查询，与分配数量无关
+        found_teacher_ids, found_class_ids = await asyncio.gather(
+            Teacher.filter(id__in=teacher_ids).values_list("id", flat=True),
+            Class.filter(id__in=class_ids).values_list("id", flat=True)
+        )
+        
+        missing_teacher_ids = teacher_ids - set(found_teacher_ids)
+        if missing_teacher_ids:
+            return create_error_response(
+                status.HTTP_404_NOT_FOUND, 
+                f"未找到ID为{sorted(missing_teacher_ids)}的教师"
+            )
+        
+        missing_class_ids = class_ids - set(found_class_ids)
+        if missing_class_ids:
+            return create_error_response(
+                status.HTTP_404_NOT_FOUND, 
+                f"未找到ID为{sorted(missing_class_ids)}的班级"
+            )
+        
+        # 任课关系没有独立的模型，直接向多对多关联表插入一条多值INSERT；
+        # 已存在的关系由关联表的唯一索引忽略，不做事先检查，并发分配同一关系时也不会失败
+        m2m_field = Class._meta.fields_map["teachers"]
+        async with in_transaction() as conn:
+            if conn.capabilities.dialect == "mysql":
+                insert, on_conflict = "INSERT IGNORE INTO", ""
+                values = ", ".join(["(%s, %s)"] * len(pairs))
+            else:
+                insert, on_conflict = "INSERT INTO", " ON CONFLICT DO NOTHING"
+                values = ", ".join(f"(${2 * i + 1}, ${2 * i + 2})" for i in range(len(pairs)))
+            assigned_count, _ = await conn.execute_query(
+                f"{insert} {m2m_field.through} "
+                f"({m2m_field.backward_key}, {m2m_field.forward_key}) VALUES {values}{on_conflict}",
+                [value for teacher_id, class_id in pairs for value in (class_id, teacher_id)]
+            )
+        if assigned_count:
+            await invalidate_teacher_class_access_cache(*class_ids)
+        
+        return ok(
+            data={
+                "assigned": assigned_count,
+                "skipped": len(pairs) - assigned_count
+            },
+            message="教师批量分配到班级成功"
+        )
+    except Exception as e:
+        return create_error_response(
+            status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            f"批量分配教师到班级失败: {str(e)}"
+        )
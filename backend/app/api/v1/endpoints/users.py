@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import List, Optional, Any
-from datetime import datetime
 from pydantic import EmailStr
+from tortoise.expressions import Q
+from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
+import base64
+import asyncio
 
 from app.api.dependencies.auth import get_current_user, get_current_active_user
 from app.api.dependencies.user_permissions import (
@@ -11,25 +15,81 @@ from app.api.dependencies.user_permissions import (
     check_user_edit_permission,
     check_role_assignment_permission
 )
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
 from app.models.enums import UserRole
-from app.models.user import User, User_Pydantic, UserIn_Pydantic
+from app.models.user import User, UserIn_Pydantic
 from app.models.teacher import Teacher
 from app.models.student import Student
 from app.models.class_model import Class
 from app.schemas.common import StandardResponse, PaginatedResponse
+from app.schemas.user import UserCreateWithRole
+from app.db.cache import memoize
+from app.crud.crud_user import (
+    USER_PROFILE_CACHE_TTL, user_profile_cache_key, invalidate_user_profile_cache
+)
+from app.middleware.logging import get_request_timestamp
+from app.middleware.error_handling import APIError
+
 
 router = APIRouter()
 
-# 错误处理函数
-def create_error_response(status_code: int, detail: str) -> StandardResponse:
-    """创建标准错误响应"""
-    return StandardResponse(
-        code=status_code,
-        message=detail,
-        data=None,
-        timestamp=datetime.now()
-    )
+# 用户响应字段（不含密码哈希），直接读取列值，不经过Pydantic模型及其关联数据的加载
+USER_FIELDS = ("id", "username", "role", "email", "phone", "is_active", "created_at", "updated_at")
+# 用户列表只读取列表展示所需的列
+USER_LIST_FIELDS = ("id", "username", "role", "email", "phone", "is_active", "created_at")
+
+def user_to_dict(user: User) -> dict:
+    """将用户对象转换为响应数据"""
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+async def load_user_profile_info(user_id: int, role: UserRole) -> dict:
+    """查询个人资料中的学生/教师附加信息，关联的班级、学科通过连接在同一条查询中取得"""
+    if role == UserRole.STUDENT:
+        student = await Student.filter(user_id=user_id).first().values(
+            "id", "name", "student_code", class_name="class_field__name"
+        )
+        if not student:
+            return {}
+        return {
+            "student_id": student["id"],
+            "name": student["name"],
+            "student_code": student["student_code"],
+            "class_name": student["class_name"]
+        }
+    
+    if role in [UserRole.TEACHER, UserRole.HEADTEACHER]:
+        teacher_fields = {"subject_name": "subject__name"}
+        # 如果是班主任，同时取得管理的班级
+        if role == UserRole.HEADTEACHER:
+            teacher_fields["managed_class_name"] = "managed_class__name"
+        teacher = await Teacher.filter(user_id=user_id).first().values(
+            "id", "name", "teacher_code", **teacher_fields
+        )
+        if not teacher:
+            return {}
+        additional_info = {
+            "teacher_id": teacher["id"],
+            "name": teacher["name"],
+            "teacher_code": teacher["teacher_code"],
+            "subject": teacher["subject_name"]
+        }
+        if teacher.get("managed_class_name"):
+            additional_info["managed_class"] = teacher["managed_class_name"]
+        return additional_info
+    
+    return {}
+
+def encode_user_cursor(last_id: int) -> str:
+    """将上一页最后一条记录的ID编码为游标"""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+def decode_user_cursor(cursor: str) -> Optional[int]:
+    """解析游标，格式不正确时返回None"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        return None
 
 @router.get("/", response_model=StandardResponse, summary="获取用户列表")
 async def get_users(
@@ -37,6 +97,8 @@ async def get_users(
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    use_cursor: bool = Query(False, description="是否使用游标分页"),
+    cursor: Optional[str] = Query(None, description="游标分页的游标，取自上一页返回的next_cursor"),
     current_user: User = Depends(check_user_management_permission)
 ):
     """
@@ -46,6 +108,8 @@ async def get_users(
     - **search**: 搜索关键词（用户名/邮箱）（可选）
     - **page**: 页码，默认1
     - **page_size**: 每页数量，默认20，最大100
+    - **use_cursor**: 使用按ID的游标分页（可选），不统计总数，深分页时无需扫描并丢弃前面的记录
+    - **cursor**: 游标（可选），传入时自动使用游标分页
     
     权限要求：
     - 管理员：可查看所有用户
@@ -53,24 +117,38 @@ async def get_users(
     - 普通教师：无权查看用户列表
     - 学生：无权查看用户列表
     """
-    try:
-        # 构建查询
-        query = User.all()
+    # 构建查询
+    query = User.all()
+    
+    if role:
+        query = query.filter(role=role)
         
-        if role:
-            query = query.filter(role=role)
-            
-        if search:
-            query = query.filter(username__icontains=search) | query.filter(email__icontains=search)
-            
+    if search:
+        query = query.filter(Q(username__icontains=search) | Q(email__icontains=search))
+    
+    if use_cursor or cursor:
+        # 游标分页：按主键顺序从上一页最后一条之后读取，多取一条用于判断是否还有下一页
+        if cursor:
+            last_id = decode_user_cursor(cursor)
+            if last_id is None:
+                raise APIError(status.HTTP_400_BAD_REQUEST, "无效的分页游标")
+            query = query.filter(id__gt=last_id)
+        
+        users = await query.order_by("id").limit(page_size + 1).values(*USER_LIST_FIELDS)
+        has_next = len(users) > page_size
+        user_data = users[:page_size]
+        
+        response_data = {
+            "items": user_data,
+            "page_size": page_size,
+            "next_cursor": encode_user_cursor(user_data[-1]["id"]) if has_next else None
+        }
+    else:
         # 计算总数
         total = await query.count()
         
         # 分页查询
-        users = await query.offset((page - 1) * page_size).limit(page_size)
-        
-        # 转换为Pydantic模型
-        user_data = [await User_Pydantic.from_tortoise_orm(user) for user in users]
+        user_data = await query.offset((page - 1) * page_size).limit(page_size).values(*USER_LIST_FIELDS)
         
         # 创建响应数据
         response_data = {
@@ -80,22 +158,17 @@ async def get_users(
             "page_size": page_size,
             "total_pages": (total + page_size - 1) // page_size
         }
-        
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="获取用户列表成功",
-            data=response_data,
-            timestamp=datetime.now()
-        )
-    except Exception as e:
-        return create_error_response(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            f"获取用户列表失败: {str(e)}"
-        )
+    
+    return StandardResponse(
+        code=status.HTTP_200_OK,
+        message="获取用户列表成功",
+        data=response_data,
+        timestamp=get_request_timestamp()
+    )
 
 @router.post("/", response_model=StandardResponse, summary="创建新用户")
 async def create_user(
-    user_in: UserIn_Pydantic,
+    user_in: UserCreateWithRole,
     current_user: User = Depends(check_user_management_permission)
 ):
     """
@@ -113,50 +186,36 @@ async def create_user(
     - 普通教师：无权创建用户
     - 学生：无权创建用户
     """
+    # 如果不是管理员，检查角色分配权限
+    if current_user.role != UserRole.ADMIN and user_in.role not in [UserRole.STUDENT]:
+        raise APIError(status.HTTP_403_FORBIDDEN, "您只能创建学生用户")
+        
+    # 直接插入，由用户名、电子邮箱的唯一索引判断冲突，省去事先的存在性查询，也避免并发创建时的竞态
+    user_dict = user_in.model_dump(exclude_unset=True)
+    user_dict["hashed_password"] = await get_password_hash_async(user_dict.pop("password"))
     try:
-        # 检查用户名是否已存在
-        existing_user = await User.get_or_none(username=user_in.username)
-        if existing_user:
-            return create_error_response(
-                status.HTTP_409_CONFLICT, 
-                "用户名已存在"
-            )
-            
-        # 检查电子邮箱是否已存在
-        if user_in.email:
-            existing_email = await User.get_or_none(email=user_in.email)
-            if existing_email:
-                return create_error_response(
-                    status.HTTP_409_CONFLICT, 
-                    "电子邮箱已存在"
-                )
-                
-        # 如果不是管理员，检查角色分配权限
-        if current_user.role != UserRole.ADMIN and user_in.role not in [UserRole.STUDENT]:
-            return create_error_response(
-                status.HTTP_403_FORBIDDEN, 
-                "您只能创建学生用户"
-            )
-            
-        # 创建用户
-        user_dict = user_in.dict(exclude_unset=True)
-        user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
         user = await User.create(**user_dict)
-        
-        # 转换为Pydantic模型
-        user_data = await User_Pydantic.from_tortoise_orm(user)
-        
-        return StandardResponse(
-            code=status.HTTP_201_CREATED,
-            message="用户创建成功",
-            data=user_data,
-            timestamp=datetime.now()
-        )
-    except Exception as e:
-        return create_error_response(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            f"创建用户失败: {str(e)}"
-        )
+    except IntegrityError:
+        # 仅在冲突时查询一次，确定是哪个字段重复
+        conflict_filter = Q(username=user_in.username)
+        if user_in.email:
+            conflict_filter |= Q(email=user_in.email)
+        conflicts = await User.filter(conflict_filter).values("username", "email")
+        if any(row["username"] == user_in.username for row in conflicts):
+            raise APIError(status.HTTP_409_CONFLICT, "用户名已存在")
+        if conflicts:
+            raise APIError(status.HTTP_409_CONFLICT, "电子邮箱已存在")
+        raise
+    
+    # 转换为响应数据
+    user_data = user_to_dict(user)
+    
+    return StandardResponse(
+        code=status.HTTP_201_CREATED,
+        message="用户创建成功",
+        data=user_data,
+        timestamp=get_request_timestamp()
+    )
 
 @router.get("/{user_id}", response_model=StandardResponse, summary="获取用户详情")
 async def get_user(
@@ -173,37 +232,26 @@ async def get_user(
     - 班主任：可查看自己管理班级的学生信息
     - 管理员：可查看任何用户的信息
     """
+    # 并发检查访问权限并获取用户信息，无权限时检查会抛出异常
     try:
-        # 检查用户是否有权限访问该用户信息
-        await check_user_access(user_id, current_user)
-        
-        # 获取用户信息
-        user = await User.get_or_none(id=user_id)
-        if not user:
-            return create_error_response(
-                status.HTTP_404_NOT_FOUND, 
-                f"未找到ID为{user_id}的用户"
-            )
-            
-        # 转换为Pydantic模型
-        user_data = await User_Pydantic.from_tortoise_orm(user)
-        
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="获取用户信息成功",
-            data=user_data,
-            timestamp=datetime.now()
+        _, user = await asyncio.gather(
+            check_user_access(user_id, current_user),
+            User.get_or_none(id=user_id)
         )
     except HTTPException as e:
-        return create_error_response(
-            e.status_code, 
-            e.detail
-        )
-    except Exception as e:
-        return create_error_response(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            f"获取用户信息失败: {str(e)}"
-        )
+        raise APIError(e.status_code, e.detail)
+    if not user:
+        raise APIError(status.HTTP_404_NOT_FOUND, f"未找到ID为{user_id}的用户")
+        
+    # 转换为响应数据
+    user_data = user_to_dict(user)
+    
+    return StandardResponse(
+        code=status.HTTP_200_OK,
+        message="获取用户信息成功",
+        data=user_data,
+        timestamp=get_request_timestamp()
+    )
 
 @router.put("/{user_id}", response_model=StandardResponse, summary="更新用户信息")
 async def update_user(
@@ -227,76 +275,69 @@ async def update_user(
     - 管理员：可更新任何用户的信息
     - 只有管理员可以更改用户角色
     """
+    # 只序列化一次请求数据，后续检查和更新都复用
+    update_data = user_update.model_dump(exclude_unset=True)
+    
+    # 并发检查编辑权限并获取用户信息，无权限时检查会抛出异常
     try:
-        # 检查用户是否有权限编辑该用户信息
-        await check_user_edit_permission(user_id, current_user)
+        _, user = await asyncio.gather(
+            check_user_edit_permission(user_id, current_user),
+            User.get_or_none(id=user_id)
+        )
+    except HTTPException as e:
+        raise APIError(e.status_code, e.detail)
+    if not user:
+        raise APIError(status.HTTP_404_NOT_FOUND, f"未找到ID为{user_id}的用户")
         
-        # 获取用户信息
-        user = await User.get_or_none(id=user_id)
-        if not user:
-            return create_error_response(
-                status.HTTP_404_NOT_FOUND, 
-                f"未找到ID为{user_id}的用户"
+    # 处理角色更改
+    if "role" in update_data:
+        # 只有管理员可以更改角色
+        if current_user.role != UserRole.ADMIN:
+            raise APIError(status.HTTP_403_FORBIDDEN, "只有管理员可以更改用户角色")
+    
+    # 密码哈希耗时较长，在事务开始前完成，避免长时间占用事务连接
+    if "password" in update_data:
+        update_data["hashed_password"] = await get_password_hash_async(update_data.pop("password"))
+    
+    # 用户名、电子邮箱的重复检查合并为一次查询
+    username_changed = bool(user_update.username) and user_update.username != user.username
+    email_changed = bool(user_update.email) and user_update.email != user.email
+    conflict_filter = None
+    if username_changed:
+        conflict_filter = Q(username=user_update.username)
+    if email_changed:
+        email_filter = Q(email=user_update.email)
+        conflict_filter = conflict_filter | email_filter if conflict_filter else email_filter
+    
+    # 重复检查与更新在同一事务中完成
+    async with in_transaction() as conn:
+        if conflict_filter:
+            conflicts = await User.filter(conflict_filter).exclude(id=user_id).using_db(conn).values(
+                "username", "email"
             )
-            
-        # 处理角色更改
-        if "role" in user_update.dict(exclude_unset=True):
-            # 只有管理员可以更改角色
-            if current_user.role != UserRole.ADMIN:
-                return create_error_response(
-                    status.HTTP_403_FORBIDDEN, 
-                    "只有管理员可以更改用户角色"
-                )
-        
-        # 处理用户名更改
-        if user_update.username and user_update.username != user.username:
-            # 检查用户名是否已存在
-            existing_user = await User.get_or_none(username=user_update.username)
-            if existing_user:
-                return create_error_response(
-                    status.HTTP_409_CONFLICT, 
-                    "用户名已存在"
-                )
-                
-        # 处理电子邮箱更改
-        if user_update.email and user_update.email != user.email:
-            # 检查电子邮箱是否已存在
-            existing_email = await User.get_or_none(email=user_update.email)
-            if existing_email:
-                return create_error_response(
-                    status.HTTP_409_CONFLICT, 
-                    "电子邮箱已存在"
-                )
+            if username_changed and any(row["username"] == user_update.username for row in conflicts):
+                raise APIError(status.HTTP_409_CONFLICT, "用户名已存在")
+            if conflicts:
+                raise APIError(status.HTTP_409_CONFLICT, "电子邮箱已存在")
         
         # 更新用户信息
-        user_dict = user_update.dict(exclude_unset=True)
-        if "password" in user_dict:
-            user_dict["hashed_password"] = get_password_hash(user_dict.pop("password"))
-            
-        for field, value in user_dict.items():
+        for field, value in update_data.items():
             setattr(user, field, value)
-            
-        await user.save()
-        
-        # 转换为Pydantic模型
-        user_data = await User_Pydantic.from_tortoise_orm(user)
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="用户信息更新成功",
-            data=user_data,
-            timestamp=datetime.now()
-        )
-    except HTTPException as e:
-        return create_error_response(
-            e.status_code, 
-            e.detail
-        )
-    except Exception as e:
-        return create_error_response(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            f"更新用户信息失败: {str(e)}"
-        )
+        # 只更新本次修改的列
+        if update_data:
+            await user.save(update_fields=[*update_data, "updated_at"], using_db=conn)
+    await invalidate_user_profile_cache(user_id)
+    
+    # 转换为响应数据
+    user_data = user_to_dict(user)
+    
+    return StandardResponse(
+        code=status.HTTP_200_OK,
+        message="用户信息更新成功",
+        data=user_data,
+        timestamp=get_request_timestamp()
+    )
 
 @router.delete("/{user_id}", response_model=StandardResponse, summary="删除用户")
 async def delete_user(
@@ -314,69 +355,48 @@ async def delete_user(
     - 普通教师：无权删除用户
     - 学生：无权删除用户
     """
-    try:
-        # 获取用户信息
-        user = await User.get_or_none(id=user_id)
-        if not user:
-            return create_error_response(
-                status.HTTP_404_NOT_FOUND, 
-                f"未找到ID为{user_id}的用户"
-            )
-            
-        # 非管理员不能删除管理员或教师
-        if current_user.role != UserRole.ADMIN and user.role in [UserRole.ADMIN, UserRole.TEACHER, UserRole.HEADTEACHER]:
-            return create_error_response(
-                status.HTTP_403_FORBIDDEN, 
-                "您没有权限删除该用户"
-            )
-            
-        # 非管理员只能删除自己班级的学生
-        if current_user.role == UserRole.HEADTEACHER and user.role == UserRole.STUDENT:
-            # 获取班主任信息
-            teacher = await Teacher.get_or_none(user_id=current_user.id)
-            if not teacher:
-                return create_error_response(
-                    status.HTTP_403_FORBIDDEN, 
-                    "未找到对应的教师信息"
-                )
-                
-            # 获取学生信息
-            student = await Student.get_or_none(user_id=user.id)
-            if not student:
-                return create_error_response(
-                    status.HTTP_404_NOT_FOUND, 
-                    "未找到对应的学生信息"
-                )
-                
-            # 获取班主任管理的班级
-            class_obj = await Class.filter(headteacher_id=teacher.id).first()
-            if not class_obj:
-                return create_error_response(
-                    status.HTTP_403_FORBIDDEN, 
-                    "您不是任何班级的班主任"
-                )
-                
-            # 检查学生是否在班主任管理的班级
-            if student.class_field_id != class_obj.id:
-                return create_error_response(
-                    status.HTTP_403_FORBIDDEN, 
-                    "您只能删除自己班级的学生用户"
-                )
+    # 获取用户信息（权限判断只需要角色）
+    user = await User.filter(id=user_id).only("id", "role").first()
+    if not user:
+        raise APIError(status.HTTP_404_NOT_FOUND, f"未找到ID为{user_id}的用户")
         
-        # 删除用户
-        await user.delete()
+    # 非管理员不能删除管理员或教师
+    if current_user.role != UserRole.ADMIN and user.role in [UserRole.ADMIN, UserRole.TEACHER, UserRole.HEADTEACHER]:
+        raise APIError(status.HTTP_403_FORBIDDEN, "您没有权限删除该用户")
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="用户删除成功",
-            data=None,
-            timestamp=datetime.now()
-        )
-    except Exception as e:
-        return create_error_response(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            f"删除用户失败: {str(e)}"
+    # 非管理员只能删除自己班级的学生
+    if current_user.role == UserRole.HEADTEACHER and user.role == UserRole.STUDENT:
+        # 并发获取班主任信息、学生信息和班主任管理的班级（班级通过班主任的用户ID关联查询）
+        teacher, student, class_obj = await asyncio.gather(
+            Teacher.get_or_none(user_id=current_user.id),
+            Student.get_or_none(user_id=user.id),
+            Class.filter(headteacher__user_id=current_user.id).first()
         )
+        if not teacher:
+            raise APIError(status.HTTP_403_FORBIDDEN, "未找到对应的教师信息")
+            
+        if not student:
+            raise APIError(status.HTTP_404_NOT_FOUND, "未找到对应的学生信息")
+            
+        if not class_obj:
+            raise APIError(status.HTTP_403_FORBIDDEN, "您不是任何班级的班主任")
+            
+        # 检查学生是否在班主任管理的班级
+        if student.class_field_id != class_obj.id:
+            raise APIError(status.HTTP_403_FORBIDDEN, "您只能删除自己班级的学生用户")
+    
+    # 删除用户，删除行数为0说明用户已被并发删除
+    deleted_count = await User.filter(id=user_id).delete()
+    if not deleted_count:
+        raise APIError(status.HTTP_404_NOT_FOUND, f"未找到ID为{user_id}的用户")
+    await invalidate_user_profile_cache(user_id)
+    
+    return StandardResponse(
+        code=status.HTTP_200_OK,
+        message="用户删除成功",
+        data=None,
+        timestamp=get_request_timestamp()
+    )
 
 @router.post("/change-role/{user_id}", response_model=StandardResponse, summary="修改用户角色")
 async def change_user_role(
@@ -396,33 +416,25 @@ async def change_user_role(
     - 普通教师：无权修改用户角色
     - 学生：无权修改用户角色
     """
-    try:
-        # 获取用户信息
-        user = await User.get_or_none(id=user_id)
-        if not user:
-            return create_error_response(
-                status.HTTP_404_NOT_FOUND, 
-                f"未找到ID为{user_id}的用户"
-            )
-            
-        # 更改用户角色
-        user.role = role
-        await user.save()
-        
-        # 转换为Pydantic模型
-        user_data = await User_Pydantic.from_tortoise_orm(user)
+    # 获取用户信息
+    user = await User.get_or_none(id=user_id)
+    if not user:
+        raise APIError(status.HTTP_404_NOT_FOUND, f"未找到ID为{user_id}的用户")
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="用户角色更改成功",
-            data=user_data,
-            timestamp=datetime.now()
-        )
-    except Exception as e:
-        return create_error_response(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            f"更改用户角色失败: {str(e)}"
-        )
+    # 更改用户角色
+    user.role = role
+    await user.save(update_fields=["role", "updated_at"])
+    await invalidate_user_profile_cache(user_id)
+    
+    # 转换为响应数据
+    user_data = user_to_dict(user)
+    
+    return StandardResponse(
+        code=status.HTTP_200_OK,
+        message="用户角色更改成功",
+        data=user_data,
+        timestamp=get_request_timestamp()
+    )
 
 @router.post("/change-password", response_model=StandardResponse, summary="修改用户密码")
 async def change_password(
@@ -439,29 +451,21 @@ async def change_password(
     权限要求：
     - 所有已登录用户：可修改自己的密码
     """
-    try:
-        # 验证当前密码
-        if not verify_password(current_password, current_user.hashed_password):
-            return create_error_response(
-                status.HTTP_400_BAD_REQUEST, 
-                "当前密码不正确"
-            )
-            
-        # 更改密码
-        current_user.hashed_password = get_password_hash(new_password)
-        await current_user.save()
+    # 验证当前密码
+    if not await verify_password_async(current_password, current_user.hashed_password):
+        raise APIError(status.HTTP_400_BAD_REQUEST, "当前密码不正确")
         
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="密码修改成功",
-            data=None,
-            timestamp=datetime.now()
-        )
-    except Exception as e:
-        return create_error_response(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            f"修改密码失败: {str(e)}"
-        )
+    # 更改密码
+    current_user.hashed_password = await get_password_hash_async(new_password)
+    await current_user.save(update_fields=["hashed_password", "updated_at"])
+    await invalidate_user_profile_cache(current_user.id)
+    
+    return StandardResponse(
+        code=status.HTTP_200_OK,
+        message="密码修改成功",
+        data=None,
+        timestamp=get_request_timestamp()
+    )
 
 @router.get("/me/profile", response_model=StandardResponse, summary="获取当前用户信息")
 async def get_current_user_profile(
@@ -473,51 +477,24 @@ async def get_current_user_profile(
     权限要求：
     - 所有已登录用户：可获取自己的个人资料
     """
-    try:
-        # 转换为Pydantic模型
-        user_data = await User_Pydantic.from_tortoise_orm(current_user)
-        
-        # 获取更多用户信息
-        profile_data = {
-            "user": user_data,
-            "additional_info": {}
-        }
-        
-        # 根据角色获取不同的额外信息
-        if current_user.role == UserRole.STUDENT:
-            student = await Student.get_or_none(user_id=current_user.id).prefetch_related("class_field")
-            if student:
-                profile_data["additional_info"] = {
-                    "student_id": student.id,
-                    "name": student.name,
-                    "student_code": student.student_code,
-                    "class_name": student.class_field.name if hasattr(student, "class_field") else None
-                }
-        
-        elif current_user.role in [UserRole.TEACHER, UserRole.HEADTEACHER]:
-            teacher = await Teacher.get_or_none(user_id=current_user.id).prefetch_related("subject")
-            if teacher:
-                profile_data["additional_info"] = {
-                    "teacher_id": teacher.id,
-                    "name": teacher.name,
-                    "teacher_code": teacher.teacher_code,
-                    "subject": teacher.subject.name if hasattr(teacher, "subject") else None
-                }
-                
-                # 如果是班主任，获取管理的班级
-                if current_user.role == UserRole.HEADTEACHER:
-                    class_obj = await Class.filter(headteacher_id=teacher.id).first()
-                    if class_obj:
-                        profile_data["additional_info"]["managed_class"] = class_obj.name
-        
-        return StandardResponse(
-            code=status.HTTP_200_OK,
-            message="获取个人资料成功",
-            data=profile_data,
-            timestamp=datetime.now()
+    # 转换为响应数据
+    user_data = user_to_dict(current_user)
+    
+    # 获取更多用户信息，附加信息优先读取缓存，未命中时再查询数据库
+    profile_data = {
+        "user": user_data,
+        "additional_info": await memoize(
+            user_profile_cache_key(current_user.id),
+            USER_PROFILE_CACHE_TTL,
+            load_user_profile_info,
+            current_user.id,
+            current_user.role
         )
-    except Exception as e:
-        return create_error_response(
-            status.HTTP_500_INTERNAL_SERVER_ERROR, 
-            f"获取个人资料失败: {str(e)}"
-        ) 
\ No newline at end of file
+    }
+    
+    return StandardResponse(
+        code=status.HTTP_200_OK,
+        message="获取个人资料成功",
+        data=profile_data,
+        timestamp=get_request_timestamp()
+    )
\ No newline at end of file
@@ -14,6 +14,10 @@ class Settings(BaseSettings):
     # CORS配置
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
     ALGORITHM: str = "HS256"
+    # 密码哈希（argon2id）参数
+    PASSWORD_HASH_TIME_COST: int = 2
+    PASSWORD_HASH_MEMORY_COST: int = 64 * 1024  # KiB
+    PASSWORD_HASH_PARALLELISM: int = 1
 
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
@@ -46,6 +50,12 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = ""
     DB_NAME: str = "edu_db"
     DB_PORT: str = "3306"
+    
+    # 数据库连接池配置（maxsize应结合worker数量和MySQL的max_connections设置）
+    DB_POOL_MINSIZE: int = 10
+    DB_POOL_MAXSIZE: int = 50
+    DB_POOL_RECYCLE: int = 300  # 空闲连接回收时间（秒）
+    DB_CONNECT_TIMEOUT: int = 5  # 建立连接超时时间（秒）
 
     @property
     def DATABASE_URI(self) -> str:
@@ -59,6 +69,8 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_MAX_CONN: int = 100
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # 空闲连接健康检查间隔（秒）
     
     @property
     def REDIS_URI(self) -> str:
@@ -7,6 +7,23 @@ from typing import List, Dict, Any, Optional
 
 from loguru import logger
 
+# 标准库logging模块的源文件，拦截日志时用于跳过logging内部的调用帧
+LOGGING_FILE = logging.__file__
+
+# 数据库日志收集的模块名关键字
+DB_LOG_NAMES = ("tortoise", "db", "sql", "orm")
+
+
+def access_log_filter(record: Dict[str, Any]) -> bool:
+    """访问日志过滤：只收集通过get_access_logger记录的日志"""
+    return "access" in record["extra"]
+
+
+def db_log_filter(record: Dict[str, Any]) -> bool:
+    """数据库日志过滤：按模块名收集数据库相关日志"""
+    name = record["name"]
+    return any(keyword in name for keyword in DB_LOG_NAMES)
+
 
 class InterceptHandler(logging.Handler):
     """
@@ -19,9 +36,9 @@ class InterceptHandler(logging.Handler):
         except ValueError:
             level = record.levelno
 
-        # 查找调用者
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
+        # 查找调用者：从emit所在帧开始，跳过标准库logging内部的帧
+        frame, depth = sys._getframe(0), 0
+        while frame and (depth == 0 or frame.f_code.co_filename == LOGGING_FILE):
             frame = frame.f_back
             depth += 1
 
@@ -115,7 +132,7 @@ def setup_logging(
             "compression": "zip",
             "encoding": "utf-8",
             "enqueue": True,
-            "filter": lambda record: "access" in record["extra"]
+            "filter": access_log_filter
         })
         
         # 数据库日志 - 单独收集数据库操作日志
@@ -129,7 +146,7 @@ def setup_logging(
             "compression": "zip",
             "encoding": "utf-8",
             "enqueue": True,
-            "filter": lambda record: any(name in record["name"] for name in ["tortoise", "db", "sql", "orm"])
+            "filter": db_log_filter
         })
     
     # 配置loguru
@@ -1,13 +1,28 @@
 from datetime import datetime, timedelta
 from typing import Any, Union, Optional
-import uuid
+import asyncio
+import secrets
 
-from jose import jwt
-from passlib.context import CryptContext
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+import jwt
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 新密码使用argon2id哈希，哈希器在模块加载时创建一次，校验时直接调用，不经过passlib的方案分派
+password_hasher = PasswordHasher(
+    time_cost=settings.PASSWORD_HASH_TIME_COST,
+    memory_cost=settings.PASSWORD_HASH_MEMORY_COST,
+    parallelism=settings.PASSWORD_HASH_PARALLELISM
+)
+
+ARGON2_HASH_PREFIX = "$argon2"
+# bcrypt保留用于校验历史密码，校验通过后升级为argon2id
+BCRYPT_HASH_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# 用户不存在时用于空校验的哈希，使认证耗时与用户是否存在无关
+DUMMY_PASSWORD_HASH = password_hasher.hash(secrets.token_urlsafe(16))
 
 
 def create_access_token(
@@ -39,7 +54,7 @@ def create_refresh_token(
         expire = datetime.utcnow() + timedelta(days=30)  # 刷新令牌默认30天有效
     
     # 添加随机jti防止重放攻击
-    jti = str(uuid.uuid4())
+    jti = secrets.token_urlsafe(16)
     
     to_encode = {"exp": expire, "sub": str(subject), "jti": jti, "type": "refresh"}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -50,11 +65,44 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     验证密码
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password.startswith(ARGON2_HASH_PREFIX):
+        try:
+            return password_hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
+    if hashed_password.startswith(BCRYPT_HASH_PREFIXES):
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+    return False
 
 
 def get_password_hash(password: str) -> str:
     """
     生成密码哈希
     """
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return password_hasher.hash(password) 
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    判断密码哈希是否需要按当前算法和参数重新生成
+    """
+    if not hashed_password.startswith(ARGON2_HASH_PREFIX):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """
+    在线程池中验证密码，避免哈希计算阻塞事件循环；哈希为空时与不存在的用户一样做一次空校验
+    """
+    if not hashed_password:
+        await asyncio.to_thread(verify_password, plain_password, DUMMY_PASSWORD_HASH)
+        return False
+    return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    在线程池中生成密码哈希，避免阻塞事件循环
+    """
+    return await asyncio.to_thread(get_password_hash, password)
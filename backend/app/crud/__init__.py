@@ -8,11 +8,15 @@ from app.crud.crud_setting import (
     get_all_public,
     create,
     update,
+    update_by_key,
     create_or_update,
+    bulk_create_or_update,
     delete,
+    delete_by_key,
     get_multi,
     get_multi_by_filter,
-    count_by_filter
+    count_by_filter,
+    get_page
 )
 
 # 通知相关CRUD功能已改为直接导入异步函数，不再使用类实例
@@ -45,17 +45,22 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
             
+        # 只写回本次修改的列，而不是整行保存
+        fields_map = self.model._meta.fields_map
+        update_fields = []
         for field in update_data:
-            if hasattr(db_obj, field):
+            if field in fields_map:
                 setattr(db_obj, field, update_data[field])
+                update_fields.append(field)
         
-        await db_obj.save()
+        if update_fields:
+            if "updated_at" in fields_map and "updated_at" not in update_fields:
+                update_fields.append("updated_at")
+            await db_obj.save(update_fields=update_fields)
         return db_obj
 
-    async def remove(self, *, id: int) -> ModelType:
+    async def remove(self, *, id: int) -> int:
         """
-        删除对象
+        删除对象，直接执行一条DELETE，返回删除的行数（0表示对象不存在）
         """
-        obj = await self.model.get(id=id)
-        await obj.delete()
-        return obj 
\ No newline at end of file
+        return await self.model.filter(id=id).delete() 
\ No newline at end of file
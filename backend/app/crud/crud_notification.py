@@ -1,46 +1,169 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Tuple
 from datetime import datetime
+import asyncio
+import heapq
+
+from tortoise import timezone
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
 
 from app.models.notification import Notification
 from app.models.user import User
 from app.schemas.notification import NotificationCreate, NotificationUpdate
+from app.db.cache import memoize, invalidate
 
 
-async def get_user_notifications(
-    user_id: int, 
-    *, 
-    skip: int = 0, 
-    limit: int = 100,
+# 通知详情字段，发送者、接收者用户名通过LEFT JOIN在同一条查询中取得
+NOTIFICATION_DETAIL_FIELDS = (
+    "id", "title", "content", "type", "level", "sender_id", "recipient_id",
+    "is_read", "is_deleted", "created_at", "expire_at"
+)
+NOTIFICATION_NAME_FIELDS = {
+    "sender_name": "sender__username",
+    "recipient_name": "recipient__username"
+}
+
+# 通知详情的Redis缓存，有效期较短，单条通知变更时删除对应缓存
+NOTIFICATION_DETAIL_CACHE_TTL = 30
+
+
+def notification_detail_cache_key(notification_id: int) -> str:
+    """通知详情的缓存键"""
+    return f"notification:detail:{notification_id}"
+
+# 全员未读通知数与用户无关，所有用户共用一份短期缓存
+BROADCAST_UNREAD_COUNT_CACHE_KEY = "notification:broadcast:unread_count"
+BROADCAST_UNREAD_COUNT_CACHE_TTL = 5
+
+# 批量标记已读，{updated_at}为更新时间占位符，{recipient}为接收者条件
+MARK_ALL_READ_SQL = (
+    "UPDATE notifications SET is_read = TRUE, updated_at = {updated_at} "
+    "WHERE {recipient} AND is_read = FALSE AND is_deleted = FALSE"
+)
+
+
+def build_user_notification_queries(
+    user_id: int,
+    *,
     is_read: Optional[bool] = None,
     type_filter: Optional[str] = None,
-    include_all: bool = True  # 是否包含全员通知
-) -> List[Notification]:
-    """获取用户的通知"""
+    include_all: bool = True
+) -> List[QuerySet[Notification]]:
+    """
+    构建用户可见通知的查询（未删除、未过期，按条件过滤）。
+    按接收者拆分为本人通知和全员通知两个查询，而不是recipient_id = ? OR recipient_id IS NULL，
+    使每个查询都能单独走(recipient_id, is_deleted, created_at)索引的范围扫描
+    """
     query = Notification.filter(
         is_deleted=False,
     )
     
-    # 过滤接收者
-    if include_all:
-        query = query.filter(
-            (Notification.recipient_id == user_id) | (Notification.recipient_id == None)
-        )
-    else:
-        query = query.filter(recipient_id=user_id)
-    
     # 过滤过期时间
-    query = query.filter(
-        (Notification.expire_at == None) | (Notification.expire_at > datetime.now())
-    )
+    query = query.filter(Q(expire_at__isnull=True) | Q(expire_at__gt=datetime.now()))
     
     # 应用过滤条件
     if is_read is not None:
         query = query.filter(is_read=is_read)
     if type_filter:
         query = query.filter(type=type_filter)
-        
-    # 按创建时间降序排序
-    return await query.order_by('-created_at').offset(skip).limit(limit).all()
+    
+    # 过滤接收者
+    queries = [query.filter(recipient_id=user_id)]
+    if include_all:
+        queries.append(query.filter(recipient_id__isnull=True))
+    return queries
+
+
+def paginate_notifications(
+    query: QuerySet[Notification],
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None
+) -> QuerySet[Notification]:
+    """
+    按创建时间、ID降序分页。
+    传入after（上一页最后一条的创建时间和ID）时使用游标分页，从该位置之后读取，不再扫描并丢弃前面的记录；
+    否则按skip偏移分页
+    """
+    query = query.order_by('-created_at', '-id')
+    if after:
+        last_created_at, last_id = after
+        return query.filter(
+            Q(created_at__lt=last_created_at) | Q(created_at=last_created_at, id__lt=last_id)
+        ).limit(limit)
+    return query.offset(skip).limit(limit)
+
+
+async def fetch_notification_page(
+    queries: List[QuerySet[Notification]],
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    with_details: bool = False
+) -> Union[List[Notification], List[Dict]]:
+    """
+    并发执行拆分后的查询，按创建时间、ID降序归并后取出一页。
+    with_details为True时直接返回带发送者、接收者用户名的字典
+    """
+    def fetch(query: QuerySet[Notification], **page_kwargs):
+        page = paginate_notifications(query, **page_kwargs)
+        if with_details:
+            return page.values(*NOTIFICATION_DETAIL_FIELDS, **NOTIFICATION_NAME_FIELDS)
+        return page
+    
+    if len(queries) == 1:
+        return await fetch(queries[0], skip=skip, limit=limit, after=after)
+    
+    # 每个查询各自取到本页末尾为止的记录，归并后再截取本页
+    window = limit if after else skip + limit
+    pages = await asyncio.gather(*(fetch(query, limit=window, after=after) for query in queries))
+    if with_details:
+        sort_key = lambda n: (n["created_at"], n["id"])
+    else:
+        sort_key = lambda n: (n.created_at, n.id)
+    merged = list(heapq.merge(*pages, key=sort_key, reverse=True))
+    return merged[:limit] if after else merged[skip:skip + limit]
+
+
+async def get_user_notifications(
+    user_id: int, 
+    *, 
+    skip: int = 0, 
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    is_read: Optional[bool] = None,
+    type_filter: Optional[str] = None,
+    include_all: bool = True  # 是否包含全员通知
+) -> List[Notification]:
+    """获取用户的通知，after为上一页最后一条通知的（创建时间, ID）"""
+    queries = build_user_notification_queries(
+        user_id, is_read=is_read, type_filter=type_filter, include_all=include_all
+    )
+    return await fetch_notification_page(queries, skip=skip, limit=limit, after=after)
+
+
+async def count_notification_queries(
+    queries: List[QuerySet[Notification]],
+    *,
+    cache_broadcast: bool = False
+) -> int:
+    """
+    并发计算拆分后各查询的数量之和。
+    cache_broadcast为True时，全员通知（第二个查询）的数量读取所有用户共用的缓存，
+    仅适用于全员未读通知数（is_read=False且无类型过滤）
+    """
+    counts = [queries[0].count()]
+    if len(queries) > 1:
+        if cache_broadcast:
+            counts.append(memoize(
+                BROADCAST_UNREAD_COUNT_CACHE_KEY, BROADCAST_UNREAD_COUNT_CACHE_TTL, queries[1].count
+            ))
+        else:
+            counts.append(queries[1].count())
+    return sum(await asyncio.gather(*counts))
 
 
 async def count_user_notifications(
@@ -51,78 +174,112 @@ async def count_user_notifications(
     include_all: bool = True
 ) -> int:
     """计算用户通知数量"""
-    query = Notification.filter(
-        is_deleted=False,
+    queries = build_user_notification_queries(
+        user_id, is_read=is_read, type_filter=type_filter, include_all=include_all
     )
-    
-    # 过滤接收者
-    if include_all:
-        query = query.filter(
-            (Notification.recipient_id == user_id) | (Notification.recipient_id == None)
+    return await count_notification_queries(
+        queries, cache_broadcast=is_read is False and not type_filter
+    )
+
+
+async def list_and_count(
+    user_id: int, 
+    *, 
+    skip: int = 0, 
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    is_read: Optional[bool] = None,
+    type_filter: Optional[str] = None,
+    include_all: bool = True,
+    with_details: bool = False
+) -> Tuple[Union[List[Notification], List[Dict]], int]:
+    """获取用户的一页通知及总数，查询条件只构建一次，列表与计数并发执行"""
+    queries = build_user_notification_queries(
+        user_id, is_read=is_read, type_filter=type_filter, include_all=include_all
+    )
+    items, total = await asyncio.gather(
+        fetch_notification_page(
+            queries, skip=skip, limit=limit, after=after, with_details=with_details
+        ),
+        count_notification_queries(
+            queries, cache_broadcast=is_read is False and not type_filter
         )
-    else:
-        query = query.filter(recipient_id=user_id)
-    
-    # 过滤过期时间
-    query = query.filter(
-        (Notification.expire_at == None) | (Notification.expire_at > datetime.now())
     )
-    
-    # 应用过滤条件
-    if is_read is not None:
-        query = query.filter(is_read=is_read)
-    if type_filter:
-        query = query.filter(type=type_filter)
-        
-    return await query.count()
+    return items, total
 
 
-async def mark_as_read(notification_id: int, user_id: int) -> Optional[Notification]:
-    """将通知标记为已读"""
-    notification = await Notification.filter(
+async def mark_as_read(notification_id: int, user_id: int) -> Optional[int]:
+    """将通知标记为已读（单条UPDATE），返回通知ID，通知不存在或无权限时返回None"""
+    updated_count = await Notification.filter(
         id=notification_id,
         is_deleted=False
     ).filter(
-        (Notification.recipient_id == user_id) | (Notification.recipient_id == None)
-    ).first()
+        Q(recipient_id=user_id) | Q(recipient_id__isnull=True)
+    ).update(is_read=True, updated_at=timezone.now())
     
-    if notification:
-        notification.is_read = True
-        await notification.save()
-    
-    return notification
+    if not updated_count:
+        return None
+    await invalidate(notification_detail_cache_key(notification_id))
+    return notification_id
 
 
 async def mark_all_as_read(user_id: int) -> int:
     """将用户所有通知标记为已读，返回更新的记录数"""
-    # 使用批量更新
-    count = await Notification.filter(
-        (Notification.recipient_id == user_id) | (Notification.recipient_id == None),
-        is_read=False,
-        is_deleted=False
-    ).update(is_read=True)
+    # 按接收者拆分为两条参数化UPDATE，在同一事务中依次执行，不构建ORM表达式，也不加载任何通知对象
+    async with in_transaction() as conn:
+        # 先取得将被标记的未读通知ID（条件与下方UPDATE一致），用于清除这些通知的详情缓存
+        unread_query = Notification.filter(is_read=False, is_deleted=False).using_db(conn)
+        unread_ids = [
+            await unread_query.filter(recipient_id=user_id).values_list("id", flat=True),
+            await unread_query.filter(recipient_id__isnull=True).values_list("id", flat=True)
+        ]
+        
+        if conn.capabilities.dialect == "mysql":
+            placeholders = ("%s", "%s")
+        else:
+            placeholders = ("$1", "$2")
+        now = timezone.now()
+        personal_count, _ = await conn.execute_query(
+            MARK_ALL_READ_SQL.format(
+                updated_at=placeholders[0], recipient=f"recipient_id = {placeholders[1]}"
+            ),
+            [now, user_id]
+        )
+        broadcast_count, _ = await conn.execute_query(
+            MARK_ALL_READ_SQL.format(updated_at=placeholders[0], recipient="recipient_id IS NULL"),
+            [now]
+        )
     
-    return count
+    cache_keys = [
+        notification_detail_cache_key(notification_id)
+        for ids in unread_ids for notification_id in ids
+    ]
+    if broadcast_count:
+        cache_keys.append(BROADCAST_UNREAD_COUNT_CACHE_KEY)
+    if cache_keys:
+        await invalidate(*cache_keys)
+    return personal_count + broadcast_count
 
 
-async def delete_notification(notification_id: int, user_id: int) -> Optional[Notification]:
-    """删除通知（软删除）"""
-    notification = await Notification.filter(
-        id=notification_id,
-        recipient_id=user_id,
-        is_deleted=False
-    ).first()
-    
-    if notification:
-        notification.is_deleted = True
-        await notification.save()
+async def delete_notification(notification_id: int, user_id: Optional[int]) -> Optional[int]:
+    """
+    删除通知（软删除，单条UPDATE），返回通知ID，通知不存在或无权限时返回None。
+    user_id为None时不限制接收者（管理员删除）
+    """
+    query = Notification.filter(id=notification_id, is_deleted=False)
+    if user_id is not None:
+        query = query.filter(recipient_id=user_id)
+    updated_count = await query.update(is_deleted=True, updated_at=timezone.now())
     
-    return notification
+    if not updated_count:
+        return None
+    await invalidate(notification_detail_cache_key(notification_id))
+    return notification_id
 
 
 async def create_notification(obj_in: NotificationCreate) -> Notification:
     """创建通知"""
-    notification_data = obj_in.dict()
+    notification_data = obj_in.model_dump()
     notification = await Notification.create(**notification_data)
     return notification
 
@@ -145,33 +302,15 @@ async def create_system_notification(
 
 
 async def get_notification_with_details(notification_id: int) -> Optional[Dict]:
-    """获取带详细信息的通知"""
-    notification = await Notification.filter(
-        id=notification_id,
-        is_deleted=False
-    ).prefetch_related('sender', 'recipient').first()
-    
-    if not notification:
-        return None
-        
-    # 构建响应数据
-    result = {
-        "id": notification.id,
-        "title": notification.title,
-        "content": notification.content,
-        "type": notification.type,
-        "level": notification.level,
-        "sender_id": notification.sender_id,
-        "recipient_id": notification.recipient_id,
-        "is_read": notification.is_read,
-        "is_deleted": notification.is_deleted,
-        "created_at": notification.created_at,
-        "expire_at": notification.expire_at,
-        "sender_name": notification.sender.username if notification.sender else None,
-        "recipient_name": notification.recipient.username if notification.recipient else None
-    }
-    
-    return result
+    """获取带详细信息的通知（优先读取缓存，缓存中的时间字段为ISO格式字符串）"""
+    return await memoize(
+        notification_detail_cache_key(notification_id),
+        NOTIFICATION_DETAIL_CACHE_TTL,
+        lambda: Notification.filter(
+            id=notification_id,
+            is_deleted=False
+        ).first().values(*NOTIFICATION_DETAIL_FIELDS, **NOTIFICATION_NAME_FIELDS)
+    )
 
 
 async def get_user_notifications_with_details(
@@ -179,76 +318,33 @@ async def get_user_notifications_with_details(
     *, 
     skip: int = 0, 
     limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
     is_read: Optional[bool] = None,
     type_filter: Optional[str] = None,
     include_all: bool = True
 ) -> List[Dict]:
-    """获取带详细信息的用户通知列表"""
-    query = Notification.filter(
-        is_deleted=False,
+    """获取带详细信息的用户通知列表，after为上一页最后一条通知的（创建时间, ID）"""
+    queries = build_user_notification_queries(
+        user_id, is_read=is_read, type_filter=type_filter, include_all=include_all
     )
-    
-    # 过滤接收者
-    if include_all:
-        query = query.filter(
-            (Notification.recipient_id == user_id) | (Notification.recipient_id == None)
-        )
-    else:
-        query = query.filter(recipient_id=user_id)
-    
-    # 过滤过期时间
-    query = query.filter(
-        (Notification.expire_at == None) | (Notification.expire_at > datetime.now())
+    return await fetch_notification_page(
+        queries, skip=skip, limit=limit, after=after, with_details=True
     )
-    
-    # 应用过滤条件
-    if is_read is not None:
-        query = query.filter(is_read=is_read)
-    if type_filter:
-        query = query.filter(type=type_filter)
-    
-    # 预先加载发送者和接收者
-    notifications = await query.prefetch_related(
-        'sender', 'recipient'
-    ).order_by('-created_at').offset(skip).limit(limit)
-    
-    # 构建响应数据
-    results = []
-    for notification in notifications:
-        results.append({
-            "id": notification.id,
-            "title": notification.title,
-            "content": notification.content,
-            "type": notification.type,
-            "level": notification.level,
-            "sender_id": notification.sender_id,
-            "recipient_id": notification.recipient_id,
-            "is_read": notification.is_read,
-            "is_deleted": notification.is_deleted,
-            "created_at": notification.created_at,
-            "expire_at": notification.expire_at,
-            "sender_name": notification.sender.username if notification.sender else None,
-            "recipient_name": notification.recipient.username if notification.recipient else None
-        })
-    
-    return results
 
 
-async def update_notification(notification_id: int, obj_in: NotificationUpdate) -> Optional[Notification]:
-    """更新通知"""
-    notification = await Notification.filter(id=notification_id).first()
-    if not notification:
-        return None
-        
-    update_data = obj_in.dict(exclude_unset=True)
-    
-    # 防止修改系统设置标志
-    if notification.type == "system" and "type" in update_data:
-        update_data.pop("type")
+async def update_notification(notification_id: int, obj_in: NotificationUpdate) -> bool:
+    """更新通知（不读取通知对象，直接在同一事务中执行UPDATE），返回通知是否存在"""
+    update_data = obj_in.model_dump(exclude_unset=True)
+    # 防止修改系统通知的类型，类型只对非系统通知单独更新
+    new_type = update_data.pop("type", None)
     
-    # 更新通知
-    for field, value in update_data.items():
-        setattr(notification, field, value)
+    async with in_transaction() as conn:
+        query = Notification.filter(id=notification_id).using_db(conn)
+        updated_count = await query.update(**update_data, updated_at=timezone.now())
+        if not updated_count:
+            return False
+        if new_type is not None:
+            await query.exclude(type="system").update(type=new_type)
     
-    await notification.save()
-    return notification 
\ No newline at end of file
+    await invalidate(notification_detail_cache_key(notification_id))
+    return True
@@ -1,8 +1,63 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Tuple
+from datetime import datetime
+import asyncio
+import orjson
+from tortoise import timezone
 from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
 
 from app.models.setting import Setting
 from app.schemas.setting import SettingCreate, SettingUpdate
+from app.db.cache import memoize, invalidate
+
+
+# 单个设置、公开设置列表和全部设置（供按分组筛选）的Redis缓存，设置发生变化时删除对应缓存
+SETTING_CACHE_TTL = 300
+PUBLIC_SETTINGS_CACHE_TTL = 600
+PUBLIC_SETTINGS_CACHE_KEY = "setting:public"
+ALL_SETTINGS_CACHE_KEY = "setting:all"
+SETTING_DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def setting_cache_key(key: str) -> str:
+    """单个设置的缓存键"""
+    return f"setting:key:{key}"
+
+
+def setting_to_dict(setting: Setting) -> Dict[str, Any]:
+    """将设置转换为可缓存的字典"""
+    return {field: getattr(setting, field) for field in Setting._meta.db_fields}
+
+
+def dump_settings(value: Union[Setting, List[Setting], None]) -> bytes:
+    """序列化单个设置或设置列表"""
+    if isinstance(value, list):
+        return orjson.dumps([setting_to_dict(setting) for setting in value])
+    return orjson.dumps(setting_to_dict(value) if value else None)
+
+
+def setting_from_dict(data: Dict[str, Any]) -> Setting:
+    """由缓存的字典还原设置对象（视为已保存的记录）"""
+    for field in SETTING_DATETIME_FIELDS:
+        if data.get(field):
+            data[field] = datetime.fromisoformat(data[field])
+    return Setting._init_from_db(**data)
+
+
+def load_settings(cached: str) -> Union[Setting, List[Setting], None]:
+    """反序列化单个设置或设置列表"""
+    value = orjson.loads(cached)
+    if isinstance(value, list):
+        return [setting_from_dict(data) for data in value]
+    return setting_from_dict(value) if value else None
+
+
+async def invalidate_setting_cache(*keys: str) -> None:
+    """删除指定设置及公开设置、全部设置列表的缓存"""
+    await invalidate(
+        PUBLIC_SETTINGS_CACHE_KEY, ALL_SETTINGS_CACHE_KEY, *(setting_cache_key(key) for key in keys)
+    )
 
 
 async def get_by_id(id: int) -> Optional[Setting]:
@@ -11,8 +66,11 @@ async def get_by_id(id: int) -> Optional[Setting]:
 
 
 async def get_by_key(key: str) -> Optional[Setting]:
-    """通过key获取设置"""
-    return await Setting.get_or_none(key=key)
+    """通过key获取设置（优先读取缓存）"""
+    return await memoize(
+        setting_cache_key(key), SETTING_CACHE_TTL, lambda: Setting.get_or_none(key=key),
+        dumps=dump_settings, loads=load_settings
+    )
 
 
 async def get_by_keys(keys: List[str]) -> List[Setting]:
@@ -21,16 +79,23 @@ async def get_by_keys(keys: List[str]) -> List[Setting]:
 
 
 async def get_by_group(group: str, is_public: bool = None) -> List[Setting]:
-    """获取某个分组的所有设置"""
-    query = Setting.filter(group=group)
-    if is_public is not None:
-        query = query.filter(is_public=is_public)
-    return await query.order_by("-order")
+    """获取某个分组的所有设置（从缓存的全部设置中筛选，设置表很小，所有分组共用一份缓存）"""
+    settings = await memoize(
+        ALL_SETTINGS_CACHE_KEY, SETTING_CACHE_TTL, lambda: Setting.all().order_by("-order"),
+        dumps=dump_settings, loads=load_settings
+    )
+    return [
+        setting for setting in settings
+        if setting.group == group and (is_public is None or setting.is_public == is_public)
+    ]
 
 
 async def get_all_public() -> List[Setting]:
-    """获取所有公开设置"""
-    return await Setting.filter(is_public=True)
+    """获取所有公开设置（优先读取缓存）"""
+    return await memoize(
+        PUBLIC_SETTINGS_CACHE_KEY, PUBLIC_SETTINGS_CACHE_TTL, lambda: Setting.filter(is_public=True),
+        dumps=dump_settings, loads=load_settings
+    )
 
 
 async def create(obj_in: Union[SettingCreate, Dict[str, Any]]) -> Setting:
@@ -38,27 +103,62 @@ async def create(obj_in: Union[SettingCreate, Dict[str, Any]]) -> Setting:
     if isinstance(obj_in, dict):
         create_data = obj_in
     else:
-        create_data = obj_in.dict()
+        create_data = obj_in.model_dump()
     
-    return await Setting.create(**create_data)
+    setting = await Setting.create(**create_data)
+    await invalidate_setting_cache(setting.key)
+    return setting
 
 
 async def update(id: int, obj_in: Union[SettingUpdate, Dict[str, Any]]) -> Optional[Setting]:
-    """更新设置"""
-    setting = await Setting.get_or_none(id=id)
-    if not setting:
-        return None
-        
+    """通过ID直接更新设置（单条UPDATE），再读取更新后的设置，设置不存在时返回None"""
     if isinstance(obj_in, dict):
         update_data = obj_in
     else:
-        update_data = obj_in.dict(exclude_unset=True)
+        update_data = obj_in.model_dump(exclude_unset=True)
     
-    # 更新设置
-    for field, value in update_data.items():
-        setattr(setting, field, value)
+    # 修改键名时需要先取得旧键名，以便删除其缓存
+    old_key = None
+    if "key" in update_data:
+        old_key = await Setting.filter(id=id).first().values_list("key", flat=True)
     
-    await setting.save()
+    updated_count = await Setting.filter(id=id).update(**update_data, updated_at=timezone.now())
+    if not updated_count:
+        return None
+    
+    setting = await Setting.get(id=id)
+    await invalidate_setting_cache(*{old_key or setting.key, setting.key})
+    return setting
+
+
+async def update_by_key(key: str, obj_in: Union[SettingUpdate, Dict[str, Any]]) -> Optional[Setting]:
+    """通过key直接更新设置（单条UPDATE，不修改is_system标志），设置不存在时返回None"""
+    if isinstance(obj_in, dict):
+        update_data = dict(obj_in)
+    else:
+        update_data = obj_in.model_dump(exclude_unset=True)
+    update_data.pop("key", None)
+    update_data.pop("is_system", None)
+
+    if update_data:
+        updated_count = await Setting.filter(key=key).update(**update_data, updated_at=timezone.now())
+        if not updated_count:
+            return None
+        await invalidate_setting_cache(key)
+    return await get_by_key(key)
+
+
+async def delete_by_key(key: str) -> Optional[Setting]:
+    """
+    通过key删除非系统设置，返回匹配的设置，设置不存在时返回None。
+    系统设置不会被删除，原样返回（调用方通过is_system判断）；读取与删除在同一事务中加锁完成
+    """
+    async with in_transaction() as conn:
+        setting = await Setting.filter(key=key).using_db(conn).select_for_update().first()
+        if not setting or setting.is_system:
+            return setting
+        await Setting.filter(id=setting.id).using_db(conn).delete()
+    await invalidate_setting_cache(key)
     return setting
 
 
@@ -69,44 +169,80 @@ async def create_or_update(obj_in: Union[SettingCreate, Dict[str, Any]]) -> Sett
     else:
         key = obj_in.key
 
-    db_obj = await get_by_key(key)
+    # 需要保存返回的对象，直接查询数据库而不读取缓存
+    db_obj = await Setting.get_or_none(key=key)
     if db_obj:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
-            update_data = obj_in.dict(exclude_unset=True)
+            update_data = obj_in.model_dump(exclude_unset=True)
             
         # 更新设置
         for field, value in update_data.items():
             setattr(db_obj, field, value)
         
         await db_obj.save()
+        await invalidate_setting_cache(db_obj.key)
         return db_obj
     else:
         return await create(obj_in)
 
 
+async def bulk_create_or_update(objs_in: List[Union[SettingCreate, Dict[str, Any]]]) -> List[Setting]:
+    """批量创建或更新设置，使用 INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE 一次写入"""
+    # 按显式设置的字段分组，保证已存在的设置只更新请求中提供的字段（与create_or_update一致）
+    groups: Dict[frozenset, List[Setting]] = {}
+    keys = []
+    for obj_in in objs_in:
+        if isinstance(obj_in, dict):
+            create_data = SettingCreate(**obj_in).model_dump()
+            set_fields = frozenset(obj_in)
+        else:
+            create_data = obj_in.model_dump()
+            set_fields = frozenset(obj_in.model_dump(exclude_unset=True))
+        groups.setdefault(set_fields - {"key"}, []).append(Setting(**create_data))
+        keys.append(create_data["key"])
+
+    for update_fields, settings in groups.items():
+        if update_fields:
+            await Setting.bulk_create(
+                settings, on_conflict=["key"], update_fields=[*update_fields, "updated_at"]
+            )
+        else:
+            await Setting.bulk_create(settings, ignore_conflicts=True)
+
+    await invalidate_setting_cache(*keys)
+
+    # 按请求顺序返回写入后的设置
+    settings_by_key = {setting.key: setting for setting in await get_by_keys(keys)}
+    return [settings_by_key[key] for key in keys if key in settings_by_key]
+
+
 async def delete(id: int) -> bool:
     """删除设置"""
+    key = await Setting.filter(id=id).first().values_list("key", flat=True)
+    if key is None:
+        return False
     deleted_count = await Setting.filter(id=id).delete()
+    await invalidate_setting_cache(key)
     return deleted_count > 0
 
 
-async def get_multi(*, skip: int = 0, limit: int = 100) -> List[Setting]:
-    """获取多条记录"""
+async def get_multi(*, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[Setting]:
+    """获取多条记录，传入after_id（上一页最后一条的ID）时按ID游标分页"""
+    if after_id is not None:
+        return await Setting.filter(id__gt=after_id).order_by("id").limit(limit)
     return await Setting.all().offset(skip).limit(limit)
 
 
-async def get_multi_by_filter(
-    *, 
-    skip: int = 0, 
-    limit: int = 100,
+def build_setting_query(
+    *,
     group: Optional[str] = None,
     is_public: Optional[bool] = None,
     is_system: Optional[bool] = None,
     search: Optional[str] = None
-) -> List[Setting]:
-    """带过滤条件的获取多条记录"""
+) -> QuerySet[Setting]:
+    """构建带过滤条件的设置查询，供列表和计数共用"""
     query = Setting.all()
     
     # 应用过滤条件
@@ -116,10 +252,29 @@ async def get_multi_by_filter(
         query = query.filter(is_public=is_public)
     if is_system is not None:
         query = query.filter(is_system=is_system)
+    # 空白关键词不参与搜索
+    search = search.strip() if search else None
     if search:
         query = query.filter(
             Q(key__icontains=search) | Q(description__icontains=search)
         )
+    
+    return query
+
+
+async def get_multi_by_filter(
+    *, 
+    skip: int = 0, 
+    limit: int = 100,
+    group: Optional[str] = None,
+    is_public: Optional[bool] = None,
+    is_system: Optional[bool] = None,
+    search: Optional[str] = None
+) -> List[Setting]:
+    """带过滤条件的获取多条记录"""
+    query = build_setting_query(
+        group=group, is_public=is_public, is_system=is_system, search=search
+    )
 
     # 应用排序和分页
     return await query.order_by("group", "-order").offset(skip).limit(limit)
@@ -133,18 +288,27 @@ async def count_by_filter(
     search: Optional[str] = None
 ) -> int:
     """带过滤条件的计数"""
-    query = Setting.all()
-    
-    # 应用过滤条件
-    if group:
-        query = query.filter(group=group)
-    if is_public is not None:
-        query = query.filter(is_public=is_public)
-    if is_system is not None:
-        query = query.filter(is_system=is_system)
-    if search:
-        query = query.filter(
-            Q(key__icontains=search) | Q(description__icontains=search)
-        )
+    query = build_setting_query(
+        group=group, is_public=is_public, is_system=is_system, search=search
+    )
+    return await query.count()
+
 
-    return await query.count() 
\ No newline at end of file
+async def get_page(
+    *, 
+    skip: int = 0, 
+    limit: int = 100,
+    group: Optional[str] = None,
+    is_public: Optional[bool] = None,
+    is_system: Optional[bool] = None,
+    search: Optional[str] = None
+) -> Tuple[List[Setting], int]:
+    """带过滤条件的分页查询，过滤条件只构建一次，分页数据与总数并发查询"""
+    query = build_setting_query(
+        group=group, is_public=is_public, is_system=is_system, search=search
+    )
+    items, total = await asyncio.gather(
+        query.order_by("group", "-order").offset(skip).limit(limit),
+        query.count()
+    )
+    return items, total
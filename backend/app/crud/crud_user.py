@@ -1,9 +1,28 @@
 from typing import Any, Dict, Optional, Union
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import (
+    get_password_hash_async, verify_password_async, password_needs_rehash
+)
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.crud.base import CRUDBase
+from app.db.cache import invalidate
+
+
+# 个人资料中学生/教师附加信息的Redis缓存，学生、教师、用户信息变更时删除对应缓存
+USER_PROFILE_CACHE_TTL = 300
+
+
+def user_profile_cache_key(user_id: int) -> str:
+    """个人资料缓存键"""
+    return f"user:profile:{user_id}"
+
+
+async def invalidate_user_profile_cache(*user_ids: Optional[int]) -> None:
+    """用户、学生或教师信息变更后清除对应用户的个人资料缓存，未关联用户（None）的忽略"""
+    user_ids = [user_id for user_id in user_ids if user_id]
+    if user_ids:
+        await invalidate(*(user_profile_cache_key(user_id) for user_id in user_ids))
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
@@ -25,7 +44,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         """
         db_obj = User(
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await get_password_hash_async(obj_in.password),
             full_name=obj_in.full_name,
             phone=obj_in.phone,
             is_active=obj_in.is_active,
@@ -41,14 +60,14 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         更新用户
         """
         if isinstance(obj_in, dict):
-            update_data = obj_in
+            update_data = dict(obj_in)
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
         
-        if "password" in update_data and update_data["password"]:
-            hashed_password = get_password_hash(update_data["password"])
-            del update_data["password"]
-            update_data["hashed_password"] = hashed_password
+        # 空密码视为未修改；哈希在线程池中计算，不阻塞事件循环
+        password = update_data.pop("password", None)
+        if password:
+            update_data["hashed_password"] = await get_password_hash_async(password)
             
         return await super().update(db_obj=db_obj, obj_in=update_data)
 
@@ -57,21 +76,25 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         通过用户名认证用户
         """
         user = await self.get_by_username(username=username)
-        if not user:
-            return None
-        if not verify_password(password, user.hashed_password):
-            return None
-        return user
+        return await self._verify_user_password(user, password)
         
     async def authenticate_email(self, *, email: str, password: str) -> Optional[User]:
         """
         通过邮箱认证用户
         """
         user = await self.get_by_email(email=email)
-        if not user:
-            return None
-        if not verify_password(password, user.hashed_password):
+        return await self._verify_user_password(user, password)
+
+    async def _verify_user_password(self, user: Optional[User], password: str) -> Optional[User]:
+        """
+        校验用户密码；用户不存在时同样做一次哈希校验，旧算法的哈希在校验通过后升级
+        """
+        hashed_password = user.hashed_password if user else None
+        if not await verify_password_async(password, hashed_password):
             return None
+        if password_needs_rehash(user.hashed_password):
+            user.hashed_password = await get_password_hash_async(password)
+            await user.save(update_fields=["hashed_password", "updated_at"])
         return user
 
     def is_active(self, user: User) -> bool:
@@ -0,0 +1,50 @@
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+from app.db.init_db import get_redis
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+async def memoize(
+    key: str,
+    ttl: int,
+    loader: Callable[..., Awaitable[Any]],
+    *args: Any,
+    dumps: Callable[[Any], bytes] = orjson.dumps,
+    loads: Callable[[Any], Any] = orjson.loads
+) -> Any:
+    """
+    读多写少数据的Redis缓存：命中时直接返回缓存值，未命中时调用loader(*args)查询并写入缓存
+
+    Redis不可用时直接查询数据库，不影响接口可用性
+    """
+    try:
+        redis = await get_redis()
+        cached = await redis.get(key)
+    except Exception as e:
+        logger.warning(f"读取缓存 {key} 失败: {str(e)}")
+        return await loader(*args)
+
+    if cached is not None:
+        return loads(cached)
+
+    value = await loader(*args)
+    try:
+        await redis.set(key, dumps(value), ex=ttl)
+    except Exception as e:
+        logger.warning(f"写入缓存 {key} 失败: {str(e)}")
+    return value
+
+
+async def invalidate(*keys: str) -> None:
+    """数据变更后删除对应的缓存，Redis不可用时忽略"""
+    if not keys:
+        return
+    try:
+        redis = await get_redis()
+        await redis.delete(*keys)
+    except Exception as e:
+        logger.warning(f"清除缓存 {', '.join(keys)} 失败: {str(e)}")
@@ -1,6 +1,7 @@
 import logging
 import redis.asyncio as redis
 from tortoise import Tortoise
+from tortoise.backends.base.config_generator import expand_db_url
 from tortoise.exceptions import OperationalError
 import json
 
@@ -12,8 +13,9 @@ from app.core.logging import get_db_logger
 # 获取数据库日志记录器
 db_logger = get_db_logger()
 
-# Redis连接池
+# Redis连接池及共享客户端
 redis_pool = None
+redis_client = None
 
 
 async def init_db(generate_only: bool = True) -> None:
@@ -45,12 +47,17 @@ async def drop_tables() -> None:
         "class_teacher", "settings", "notifications"  # m2m关系表
     ]
     
-    for table in table_names:
-        try:
-            await Tortoise.get_connection("default").execute_query(f"DROP TABLE IF EXISTS {table}")
-            db_logger.info(f"已删除表: {table}")
-        except Exception as e:
-            db_logger.error(f"删除表 {table} 失败: {str(e)}")
+    # 一次执行全部删除，临时关闭外键检查，无需按依赖顺序逐表删除
+    tables = ", ".join(table_names)
+    try:
+        await Tortoise.get_connection("default").execute_script(
+            "SET FOREIGN_KEY_CHECKS = 0; "
+            f"DROP TABLE IF EXISTS {tables}; "
+            "SET FOREIGN_KEY_CHECKS = 1;"
+        )
+        db_logger.info(f"已删除表: {tables}")
+    except Exception as e:
+        db_logger.error(f"删除表失败: {str(e)}")
 
 
 async def init_tortoise(generate_only: bool = True) -> None:
@@ -62,11 +69,23 @@ async def init_tortoise(generate_only: bool = True) -> None:
     """
     db_logger.info("正在初始化Tortoise-ORM...")
     
-    # 使用MySQL连接
-    await Tortoise.init(
-        db_url=settings.DATABASE_URI,
-        modules={"models": TORTOISE_MODELS},
-    )
+    # 使用MySQL连接，连接池大小和超时以URL中的参数优先，否则使用配置中的默认值
+    connection = expand_db_url(settings.DATABASE_URI)
+    credentials = connection["credentials"]
+    credentials.setdefault("minsize", settings.DB_POOL_MINSIZE)
+    credentials.setdefault("maxsize", settings.DB_POOL_MAXSIZE)
+    credentials.setdefault("pool_recycle", settings.DB_POOL_RECYCLE)
+    credentials.setdefault("connect_timeout", settings.DB_CONNECT_TIMEOUT)
+    
+    await Tortoise.init(config={
+        "connections": {"default": connection},
+        "apps": {
+            "models": {
+                "models": TORTOISE_MODELS,
+                "default_connection": "default",
+            }
+        },
+    })
     
     # 如果不是仅生成模式，则先删除现有表
     if not generate_only:
@@ -98,7 +117,7 @@ async def init_redis() -> None:
     """
     初始化Redis连接
     """
-    global redis_pool
+    global redis_pool, redis_client
     
     db_logger.info("正在初始化Redis连接...")
     try:
@@ -106,11 +125,14 @@ async def init_redis() -> None:
         db_logger.info(f"Redis连接URL: {redis_url}")
         redis_pool = redis.ConnectionPool.from_url(
             redis_url,
-            decode_responses=True
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONN,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL
         )
+        # 客户端只创建一次，所有请求共用
+        redis_client = redis.Redis(connection_pool=redis_pool)
         # 测试连接
-        test_conn = redis.Redis(connection_pool=redis_pool)
-        await test_conn.ping()
+        await redis_client.ping()
         db_logger.info("Redis连接测试成功")
     except Exception as e:
         db_logger.error(f"Redis连接失败: {str(e)}")
@@ -233,20 +255,18 @@ async def init_settings() -> None:
     ]
     
     try:
-        conn = Tortoise.get_connection("default")
-        # 检查settings表是否为空
-        count = await conn.execute_query_dict("SELECT COUNT(*) as count FROM settings")
-        
+        # 检查settings表是否为空（SELECT 1 ... LIMIT 1，无需统计全表）
         # 如果表不为空且不是强制重新生成，则不添加默认设置
-        if int(count[0]["count"]) > 0:
+        if await Setting.exists():
             db_logger.info("系统设置表已有数据，跳过初始化")
             return
         
-        # 添加默认设置
-        for setting_data in default_settings:
-            setting = Setting(**setting_data)
-            await setting.save()
-            db_logger.info(f"已添加设置: {setting_data['key']}")
+        # 添加默认设置，一条多值INSERT写入
+        await Setting.bulk_create(
+            [Setting(**setting_data) for setting_data in default_settings],
+            batch_size=100
+        )
+        db_logger.info(f"已添加设置: {', '.join(setting_data['key'] for setting_data in default_settings)}")
         
         db_logger.info("系统设置初始化完成")
     except Exception as e:
@@ -255,9 +275,9 @@ async def init_settings() -> None:
 
 async def get_redis() -> redis.Redis:
     """
-    获取Redis连接
+    获取共享的Redis客户端
     """
-    return redis.Redis(connection_pool=redis_pool)
+    return redis_client
 
 
 async def close_db_connections() -> None:
@@ -267,8 +287,12 @@ async def close_db_connections() -> None:
     db_logger.info("正在关闭数据库连接...")
     await Tortoise.close_connections()
     
-    global redis_pool
+    global redis_pool, redis_client
+    if redis_client:
+        await redis_client.close()
+        redis_client = None
     if redis_pool:
         await redis_pool.disconnect()
+        redis_pool = None
     
     db_logger.info("数据库连接已关闭") 
\ No newline at end of file
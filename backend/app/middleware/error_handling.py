@@ -1,17 +1,39 @@
 import traceback
 from typing import Callable, Dict, Any
 
-from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
 from app.core.logging import get_logger
+from app.middleware.logging import get_request_timestamp
 
 # 获取错误日志记录器
 error_logger = get_logger("error")
 
 
+class APIError(HTTPException):
+    """
+    业务错误，由全局处理器转换为标准响应格式（code/message/data/timestamp），HTTP状态码保持200
+    """
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code=status_code, detail=detail)
+
+
+def internal_error_response(exc: Exception) -> ORJSONResponse:
+    """
+    未处理异常的标准响应（code/message/data/timestamp），与APIError一致HTTP状态码保持200，
+    前端统一按响应体中的code处理错误
+    """
+    return ORJSONResponse(content={
+        "code": 500,
+        "message": f"服务器内部错误: {str(exc)}",
+        "data": None,
+        "timestamp": get_request_timestamp()
+    })
+
+
 class ErrorLoggingMiddleware(BaseHTTPMiddleware):
     """
     错误日志中间件，捕获并记录请求处理过程中的异常
@@ -34,14 +56,8 @@ class ErrorLoggingMiddleware(BaseHTTPMiddleware):
                 f"Traceback: {traceback.format_exc()}"
             )
             
-            # 返回JSON错误响应
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "detail": "Internal server error",
-                    "request_id": request_id
-                }
-            )
+            # 返回标准错误响应
+            return internal_error_response(e)
 
 
 class APIExceptionHandler:
@@ -53,6 +69,16 @@ class APIExceptionHandler:
         self.setup_exception_handlers()
     
     def setup_exception_handlers(self):
+        # 注册业务错误处理，端点直接抛出APIError即可，无需各自构造错误响应
+        @self.app.exception_handler(APIError)
+        async def api_error_handler(request: Request, exc: APIError) -> Response:
+            return ORJSONResponse(content={
+                "code": exc.status_code,
+                "message": exc.detail,
+                "data": None,
+                "timestamp": get_request_timestamp()
+            })
+        
         # 注册全局异常处理
         @self.app.exception_handler(Exception)
         async def global_exception_handler(request: Request, exc: Exception) -> Response:
@@ -67,15 +93,8 @@ class APIExceptionHandler:
                 f"Traceback: {traceback.format_exc()}"
             )
             
-            # 返回JSON错误响应
-            return JSONResponse(
-                status_code=500,
-                content={
-                    "detail": "Internal server error",
-                    "message": str(exc),
-                    "request_id": request_id
-                }
-            )
+            # 返回标准错误响应
+            return internal_error_response(exc)
 
 
 def setup_error_handling(app: FastAPI):
@@ -1,6 +1,8 @@
 import time
+from contextvars import ContextVar
+from datetime import datetime
 from uuid import uuid4
-from typing import Callable
+from typing import Callable, Optional
 
 from fastapi import FastAPI, Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -11,6 +13,14 @@ from app.core.logging import get_access_logger
 # 获取访问日志记录器
 access_logger = get_access_logger()
 
+# 当前请求的时间戳，由LoggingMiddleware在请求开始时设置，同一请求内的响应复用该值
+request_timestamp: ContextVar[Optional[datetime]] = ContextVar("request_timestamp", default=None)
+
+
+def get_request_timestamp() -> datetime:
+    """获取当前请求的时间戳，不在请求上下文中时返回当前时间"""
+    return request_timestamp.get() or datetime.now()
+
 
 class LoggingMiddleware(BaseHTTPMiddleware):
     """
@@ -25,8 +35,9 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         # 添加请求ID到请求状态中
         request.state.request_id = request_id
         
-        # 记录请求开始时间
+        # 记录请求开始时间，并作为本次请求的响应时间戳
         start_time = time.time()
+        request_timestamp.set(datetime.fromtimestamp(start_time))
         
         # 获取客户端信息
         client_host = request.client.host if request.client else "unknown"
@@ -12,7 +12,7 @@ class Class(BaseModel):
     
     # 外键关系
     grade = fields.ForeignKeyField("models.Grade", related_name="classes")
-    headteacher = fields.ForeignKeyField("models.Teacher", related_name="managed_class", null=True)
+    headteacher = fields.ForeignKeyField("models.Teacher", related_name="managed_class", null=True, index=True)
     
     # 反向关系
     students = fields.ReverseRelation["Student"]
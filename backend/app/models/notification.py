@@ -18,6 +18,8 @@ class Notification(BaseModel):
     
     class Meta:
         table = "notifications"
+        # 用户通知列表按接收者过滤、按创建时间倒序分页
+        indexes = (("recipient", "is_deleted", "created_at"),)
     
     def __str__(self):
         return f"{self.title} ({self.type})"
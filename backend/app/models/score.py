@@ -11,7 +11,7 @@ class Score(BaseModel):
     
     # 外键关系
     student = fields.ForeignKeyField("models.Student", related_name="scores")
-    subject = fields.ForeignKeyField("models.Subject", related_name="scores")
+    subject = fields.ForeignKeyField("models.Subject", related_name="scores", index=True)
     exam = fields.ForeignKeyField("models.Exam", related_name="scores")
     
     class Meta:
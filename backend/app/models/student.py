@@ -24,6 +24,8 @@ class Student(BaseModel):
     
     class Meta:
         table = "students"
+        # 按班级筛选并按学号排序的列表查询可直接走索引范围扫描
+        indexes = (("class_field", "student_code"),)
     
     def __str__(self):
         return f"{self.name} ({self.student_code})"
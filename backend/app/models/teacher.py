@@ -14,7 +14,7 @@ class Teacher(BaseModel):
     
     # 外键关系
     user = fields.OneToOneField("models.User", related_name="teacher")
-    subject = fields.ForeignKeyField("models.Subject", related_name="teachers")
+    subject = fields.ForeignKeyField("models.Subject", related_name="teachers", index=True)
     
     # 反向关系
     managed_class = fields.ReverseRelation["Class"]
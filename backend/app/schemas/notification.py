@@ -51,4 +51,5 @@ class NotificationListResponse(BaseModel):
     """通知列表响应"""
     items: List[Notification]
     total: int
-    unread_count: int 
\ No newline at end of file
+    unread_count: int
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有更多数据时为空") 
\ No newline at end of file
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class SubjectCreate(BaseModel):
+    """创建学科模型"""
+    name: str = Field(..., max_length=50, description="学科名称")
+    code: str = Field(..., max_length=20, description="学科代码")
+    credit: float = Field(0, description="学分")
+    description: Optional[str] = Field(None, description="学科描述")
+
+class SubjectUpdate(BaseModel):
+    """更新学科模型"""
+    name: Optional[str] = Field(None, max_length=50, description="学科名称")
+    code: Optional[str] = Field(None, max_length=20, description="学科代码")
+    credit: Optional[float] = Field(None, description="学分")
+    description: Optional[str] = Field(None, description="学科描述（可设置为空字符串）")
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class TeacherCreate(BaseModel):
+    """创建教师模型"""
+    name: str = Field(..., max_length=50, description="教师姓名")
+    teacher_code: str = Field(..., max_length=20, description="教师编号")
+    subject_id: int = Field(..., description="学科ID")
+    user_id: int = Field(..., description="用户ID")
+    phone: Optional[str] = Field(None, max_length=20, description="联系电话")
+    email: Optional[str] = Field(None, max_length=50, description="电子邮箱")
+
+class TeacherUpdate(BaseModel):
+    """更新教师模型"""
+    name: Optional[str] = Field(None, max_length=50, description="教师姓名")
+    teacher_code: Optional[str] = Field(None, max_length=20, description="教师编号")
+    subject_id: Optional[int] = Field(None, description="学科ID")
+    phone: Optional[str] = Field(None, max_length=20, description="联系电话（可设置为空字符串）")
+    email: Optional[str] = Field(None, max_length=50, description="电子邮箱（可设置为空字符串）")
+
+class TeacherClassAssignment(BaseModel):
+    """教师任课分配模型"""
+    teacher_id: int = Field(..., description="教师ID")
+    class_id: int = Field(..., description="班级ID")
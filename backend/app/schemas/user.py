@@ -1,6 +1,8 @@
 from typing import Optional, List
 from pydantic import BaseModel, EmailStr, Field
 
+from app.models.enums import UserRole
+
 # 共享属性
 class UserBase(BaseModel):
     email: Optional[EmailStr] = None
@@ -14,6 +16,15 @@ class UserCreate(UserBase):
     email: EmailStr
     password: str
 
+# 用户管理接口创建用户时提交的数据（包含明文密码，入库前哈希）
+class UserCreateWithRole(BaseModel):
+    username: str = Field(..., max_length=50)
+    password: str
+    role: UserRole = UserRole.STUDENT
+    email: Optional[EmailStr] = None
+    phone: Optional[str] = Field(None, max_length=20)
+    is_active: bool = True
+
 # 更新时可以修改的属性
 class UserUpdate(UserBase):
     password: Optional[str] = None
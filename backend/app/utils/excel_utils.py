@@ -1,15 +1,109 @@
 import io
 import pandas as pd
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterable, Sequence
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side
 from fastapi import UploadFile, HTTPException, status
 import xlrd
+import xlsxwriter
 import datetime
 
+class ExcelRowWriter:
+    """
+    逐批写入的Excel生成器
+    
+    使用xlsxwriter的constant_memory模式，已写入的行会立即落到临时文件，
+    内存占用与导出行数无关，适合大批量数据导出
+    """
+    
+    def __init__(self, column_titles: List[str], title: str = None, sheet_name: str = 'Sheet1'):
+        """
+        Args:
+            column_titles: 列标题列表
+            title: 标题（可选）
+            sheet_name: 工作表名称（可选）
+        """
+        self.output = io.BytesIO()
+        self.workbook = xlsxwriter.Workbook(self.output, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd'
+        })
+        self.worksheet = self.workbook.add_worksheet(sheet_name)
+        self.column_widths = [len(str(col)) for col in column_titles]
+        self.row_num = 0
+        
+        # 如果有标题，合并单元格写入标题，数据从第2行开始
+        if title:
+            title_format = self.workbook.add_format({
+                'bold': True,
+                'font_size': 14,
+                'align': 'center',
+                'valign': 'vcenter'
+            })
+            self.worksheet.merge_range(0, 0, 0, len(column_titles) - 1, title, title_format)
+            self.row_num = 1
+        
+        # 写入标题行
+        header_format = self.workbook.add_format({
+            'bold': True,
+            'bg_color': '#D7E4BC',
+            'border': 1
+        })
+        self.worksheet.write_row(self.row_num, 0, column_titles, header_format)
+        self.row_num += 1
+    
+    def append_rows(self, rows: Iterable[Sequence[Any]]) -> None:
+        """按顺序追加数据行，同时记录每列最大宽度"""
+        for values in rows:
+            self.worksheet.write_row(self.row_num, 0, values)
+            for i, value in enumerate(values):
+                if value is not None:
+                    self.column_widths[i] = max(self.column_widths[i], len(str(value)))
+            self.row_num += 1
+    
+    def close(self) -> io.BytesIO:
+        """
+        完成写入并返回Excel文件的字节流
+        
+        Returns:
+            io.BytesIO: Excel文件的字节流
+        """
+        try:
+            # 调整列宽
+            for i, width in enumerate(self.column_widths):
+                self.worksheet.set_column(i, i, min(width + 2, 30))
+            
+            self.workbook.close()
+            self.output.seek(0)
+            
+            return self.output
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"生成Excel文件失败: {str(e)}"
+            )
+
 class ExcelUtils:
     """Excel导入导出工具类"""
     
+    @staticmethod
+    def get_engine(filename: Optional[str]) -> Optional[str]:
+        """
+        根据文件扩展名选择读取引擎
+        
+        Args:
+            filename: 上传文件名
+        
+        Returns:
+            Optional[str]: xlsx使用openpyxl，xls使用xlrd，无法判断时返回None（由pandas自动识别）
+        """
+        file_ext = (filename or '').split('.')[-1].lower()
+        if file_ext == 'xlsx':
+            return 'openpyxl'
+        if file_ext == 'xls':
+            return 'xlrd'
+        return None
+    
     @staticmethod
     async def read_excel(file: UploadFile) -> pd.DataFrame:
         """
@@ -26,12 +120,8 @@ class ExcelUtils:
             contents = await file.read()
             
             # 根据文件扩展名判断使用哪个引擎
-            file_ext = file.filename.split('.')[-1].lower()
-            if file_ext == 'xlsx':
-                engine = 'openpyxl'
-            elif file_ext == 'xls':
-                engine = 'xlrd'
-            else:
+            engine = ExcelUtils.get_engine(file.filename)
+            if engine is None:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="不支持的文件格式，只支持.xlsx和.xls格式"
@@ -48,13 +138,13 @@ class ExcelUtils:
             )
     
     @staticmethod
-    def write_excel(data: List[Dict[str, Any]], columns: List[Tuple[str, str]], 
+    def write_excel(data: Union[List[Dict[str, Any]], pd.DataFrame], columns: List[Tuple[str, str]], 
                     title: str = None, sheet_name: str = 'Sheet1') -> io.BytesIO:
         """
         生成Excel文件
         
         Args:
-            data: 要写入的数据列表
+            data: 要写入的数据列表，也可以直接传入DataFrame以避免构造中间字典
             columns: 列名和标题的元组列表，例如 [('id', 'ID'), ('name', '姓名')]
             title: 标题（可选）
             sheet_name: 工作表名称（可选）
@@ -70,16 +160,11 @@ class ExcelUtils:
             column_keys = [col[0] for col in columns]
             column_titles = [col[1] for col in columns]
             
-            # 创建DataFrame
-            df = pd.DataFrame(data)
-            
-            # 确保所有列都存在，如果不存在则添加空列
-            for key in column_keys:
-                if key not in df.columns:
-                    df[key] = None
+            # 创建DataFrame（已是DataFrame时直接使用）
+            df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
             
-            # 只保留需要的列，并按指定顺序排列
-            df = df[column_keys]
+            # 只保留需要的列并按指定顺序排列，不存在的列补为空列
+            df = df.reindex(columns=column_keys)
             
             # 重命名列
             df.columns = column_titles
@@ -15,7 +15,6 @@ from pathlib import Path
 import sys
 import os
 import logging
-from passlib.context import CryptContext
 import traceback
 
 # 添加项目根目录到Python路径
@@ -25,6 +24,7 @@ sys.path.insert(0, str(project_root))
 
 # 导入应用模块
 from app.core.config import settings
+from app.core.security import get_password_hash
 from app.db.init_db import init_db, close_db_connections
 from app.models.user import User
 from app.models.enums import UserRole
@@ -48,9 +48,6 @@ logger = logging.getLogger("数据生成")
 # 创建Faker实例
 fake = Faker(['zh_CN'])
 
-# 密码Hash上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # 科目定义
 SUBJECTS = {
     "语文": {"code": "CHN", "max_score": 120},
@@ -77,10 +74,6 @@ GRADE_SUBJECTS = {
 # 考试类型
 EXAM_TYPES = ["月考", "期中", "期末"]
 
-# 生成密码哈希
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
 # 生成正态分布的分数
 def generate_normal_score(mean: float, std_dev: float, min_score: float, max_score: float) -> float:
     score = np.random.normal(mean, std_dev)